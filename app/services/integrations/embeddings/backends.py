@@ -2,19 +2,20 @@ from __future__ import annotations
 
 import asyncio
 import os
+import threading
 import time
-from typing import List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import TYPE_CHECKING, List, Optional
 
-import openai
-from openai import RateLimitError  # correct import
-import httpx
+from ha_rag_bridge.logging import get_logger
 
-try:
-    import google.genai as genai
-except Exception:  # pragma: no cover - optional dependency
-    genai = None
+from .cache import cached_embeddings
 
-from ha_rag_bridge.logging import get_logger
+# openai, httpx and google.genai are imported by the backends that use them,
+# so selecting the local backend does not pay for the API client stacks.
+if TYPE_CHECKING:
+    import httpx
 
 logger = get_logger(__name__)
 
@@ -24,18 +25,45 @@ class BaseEmbeddingBackend:
 
     DIMENSION: int
 
+    @property
+    def cache_namespace(self) -> str:
+        """Embedding cache partition: vectors are only shared within a model."""
+        return f"{type(self).__name__}:{self.DIMENSION}"
+
     def embed(self, texts: List[str]) -> List[List[float]]:
         raise NotImplementedError
 
 
+def _retry_after(exc: Exception, default: int = 60) -> int:
+    """Seconds to wait from an API error's ``Retry-After`` header, else ``default``."""
+    value = (getattr(exc, "headers", None) or {}).get("Retry-After")
+    if not value:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        return default
+
+
+@lru_cache(maxsize=1)
+def _load_local_model(model_name: str, device: str):
+    """Load the SentenceTransformer model once per process for ``model_name``."""
+    from sentence_transformers import SentenceTransformer
+
+    print(f"Loading SentenceTransformer model: {model_name} on {device}")
+    return SentenceTransformer(model_name, device=device)
+
+
 class LocalBackend(BaseEmbeddingBackend):
     """Embed texts locally using SentenceTransformers optimized for CPU."""
 
     DIMENSION = 384
+    # sentence-transformers defaults to 32; encode() already length-sorts the
+    # inputs, so each batch is padded only to its own longest text
+    ENCODE_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", 64))
     _MODEL = None
 
     def __init__(self) -> None:
-        from sentence_transformers import SentenceTransformer
         import os
         import torch
 
@@ -60,12 +88,13 @@ class LocalBackend(BaseEmbeddingBackend):
             # Threads already set, skip
             pass
 
-        if LocalBackend._MODEL is None:
-            print(f"Loading SentenceTransformer model: {model_name} on {device}")
+        self.model_name = model_name
+        model = _load_local_model(model_name, device)
+        if LocalBackend._MODEL is not model:
+            LocalBackend._MODEL = model
             print(f"CPU threads: {cpu_threads}")
-            LocalBackend._MODEL = SentenceTransformer(model_name, device=device)
 
-            # Dynamic dimension detection based on model (only once)
+            # Dynamic dimension detection based on model (once per loaded model)
             sample_embedding = LocalBackend._MODEL.encode(
                 ["test"], convert_to_numpy=True, normalize_embeddings=True
             )
@@ -74,14 +103,21 @@ class LocalBackend(BaseEmbeddingBackend):
 
         self.model = LocalBackend._MODEL
 
+    @property
+    def cache_namespace(self) -> str:
+        return f"local:{self.model_name}:{self.DIMENSION}"
+
+    @cached_embeddings
     def embed(self, texts: List[str]) -> List[List[float]]:
         embeddings = self.model.encode(
             texts,
+            batch_size=self.ENCODE_BATCH_SIZE,
             show_progress_bar=False,
             convert_to_numpy=True,
             normalize_embeddings=True,
         )
-        return [e.tolist() for e in embeddings]
+        # One C-level conversion of the whole (N, dim) matrix, not one per row
+        return embeddings.tolist()
 
 
 class EnhancedLocalBackend(LocalBackend):
@@ -144,43 +180,113 @@ class EnhancedLocalBackend(LocalBackend):
 class OpenAIBackend(BaseEmbeddingBackend):
     """Embed texts using the OpenAI API."""
 
+    MODEL_NAME = "text-embedding-3-large"
     DIMENSION = 1536
+    # Inputs per request: the API allows 2048, smaller chunks let large jobs
+    # run several requests at once
+    MAX_BATCH_INPUTS = 256
+    MAX_BATCH_TOKENS = 250_000  # headroom under the 300k tokens/request limit
+    MAX_CONCURRENCY = 8  # chunk requests in flight at once (threads or tasks)
 
     def __init__(self) -> None:
-        self.client = openai.OpenAI(api_key=os.environ["OPENAI_API_KEY"])
-
+        import openai
+        from openai import RateLimitError
+
+        api_key = os.environ["OPENAI_API_KEY"]
+        self.client = openai.OpenAI(api_key=api_key)
+        # Native async client for callers already on an event loop
+        self.aclient = openai.AsyncOpenAI(api_key=api_key)
+        self._RateLimitError = RateLimitError
+
+    def _retry_delay(self, exc: Exception) -> Optional[int]:
+        """Seconds to sleep before retrying after ``exc``, or None if it is fatal."""
+        if isinstance(exc, self._RateLimitError):
+            retry_after = _retry_after(exc)
+            logger.warning("rate limit exceeded, sleeping", retry_after=retry_after)
+            return retry_after
+        if "quota" in str(exc).lower():
+            retry_after = _retry_after(exc)
+            logger.warning("quota exceeded, sleeping", retry_after=retry_after)
+            return retry_after
+        # Other errors are fatal
+        logger.error("embedding error", error=str(exc))
+        return None
+
+    def _chunks(self, texts: List[str]) -> List[List[str]]:
+        """Greedily pack ``texts`` into chunks that fit one embeddings request.
+
+        The UTF-8 byte length bounds the token count from above (every BPE
+        token covers at least one byte), so no tokenizer is needed to stay
+        under the per-request token limit.
+        """
+        chunks: List[List[str]] = []
+        current: List[str] = []
+        used = 0
+        for text in texts:
+            cost = len(text.encode("utf-8"))
+            if current and (
+                used + cost > self.MAX_BATCH_TOKENS
+                or len(current) >= self.MAX_BATCH_INPUTS
+            ):
+                chunks.append(current)
+                current, used = [], 0
+            current.append(text)
+            used += cost
+        if current:
+            chunks.append(current)
+        return chunks
+
+    @property
+    def cache_namespace(self) -> str:
+        return f"openai:{self.MODEL_NAME}:{self.DIMENSION}"
+
+    @cached_embeddings
     def embed(self, texts: List[str]) -> List[List[float]]:
-        model = "text-embedding-3-large"
+        chunks = self._chunks(texts)
+        if len(chunks) > 1:
+            with ThreadPoolExecutor(
+                max_workers=min(self.MAX_CONCURRENCY, len(chunks))
+            ) as pool:
+                results = list(pool.map(self._embed_chunk, chunks))
+        else:
+            results = [self._embed_chunk(chunk) for chunk in chunks]
+        return [vec for vectors in results for vec in vectors]
+
+    def _embed_chunk(self, texts: List[str]) -> List[List[float]]:
         # Retry indefinitely on rate limits or quota errors, sleeping based on Retry-After or fixed 60s
         while True:
             try:
-                resp = self.client.embeddings.create(model=model, input=texts)
+                resp = self.client.embeddings.create(model=self.MODEL_NAME, input=texts)
                 return [item.embedding for item in resp.data]  # type: ignore[index]
-            except RateLimitError as exc:
-                retry_after = 60
-                if hasattr(exc, "headers") and exc.headers.get("Retry-After"):
-                    try:
-                        retry_after = int(exc.headers["Retry-After"])
-                    except ValueError:
-                        pass
-                logger.warning("rate limit exceeded, sleeping", retry_after=retry_after)
+            except Exception as exc:
+                retry_after = self._retry_delay(exc)
+                if retry_after is None:
+                    raise
                 time.sleep(retry_after)
+
+    async def aembed(self, texts: List[str]) -> List[List[float]]:
+        """Async variant of :meth:`embed`; chunks are requested concurrently."""
+        sem = asyncio.Semaphore(self.MAX_CONCURRENCY)
+
+        async def one(chunk: List[str]) -> List[List[float]]:
+            async with sem:
+                return await self._aembed_chunk(chunk)
+
+        results = await asyncio.gather(*(one(chunk) for chunk in self._chunks(texts)))
+        return [vec for vectors in results for vec in vectors]
+
+    async def _aembed_chunk(self, texts: List[str]) -> List[List[float]]:
+        while True:
+            try:
+                resp = await self.aclient.embeddings.create(
+                    model=self.MODEL_NAME, input=texts
+                )
+                return [item.embedding for item in resp.data]  # type: ignore[index]
             except Exception as exc:
-                msg = str(exc).lower()
-                if "quota" in msg:
-                    retry_after = 60
-                    headers = getattr(exc, "headers", {}) or {}
-                    if headers.get("Retry-After"):
-                        try:
-                            retry_after = int(headers["Retry-After"])
-                        except ValueError:
-                            pass
-                    logger.warning("quota exceeded, sleeping", retry_after=retry_after)
-                    time.sleep(retry_after)
-                    continue
-                # Other errors are fatal
-                logger.error("embedding error", error=str(exc))
-                raise
+                retry_after = self._retry_delay(exc)
+                if retry_after is None:
+                    raise
+                await asyncio.sleep(retry_after)
 
 
 class GeminiBackend(BaseEmbeddingBackend):
@@ -188,12 +294,20 @@ class GeminiBackend(BaseEmbeddingBackend):
     DIMENSION = int(os.getenv("GEMINI_OUTPUT_DIM", 1536))
     MAX_RETRIES = 3
     RATE_LIMIT = 100  # requests per minute
+    BATCH_SIZE = 100  # batchEmbedContents limit per request
+    MAX_CONCURRENCY = 8  # batches in flight at once (threads or tasks)
 
     def __init__(self) -> None:
         # Configure GenAI client if available, otherwise fall back to HTTP API
         api_key = os.environ["GEMINI_API_KEY"]
         use_sdk = os.getenv("GEMINI_USE_SDK", "0").lower() in ("1", "true", "yes")
-        if use_sdk and genai is not None:
+        genai = None
+        if use_sdk:
+            try:
+                import google.genai as genai
+            except Exception:  # pragma: no cover - optional dependency
+                genai = None
+        if genai is not None:
             self.client = genai.Client(api_key=api_key)
             self._api_key = None
         else:
@@ -201,111 +315,152 @@ class GeminiBackend(BaseEmbeddingBackend):
             self._api_key = api_key
 
         # Rate limiting követéséhez
-        self._last_request_time = 0.0
+        self._last_request_time = float("-inf")
         self._min_interval = 60.0 / self.RATE_LIMIT
+        self._rate_lock = threading.Lock()
+
+    def _batch_request(self, texts: List[str]) -> tuple[str, dict]:
+        """Build the batchEmbedContents URL and payload for ``texts``."""
+        model = f"models/{self.MODEL_NAME}"
+        url = f"https://generativelanguage.googleapis.com/v1beta/{model}:batchEmbedContents"
+        payload = {
+            "requests": [
+                {"model": model, "content": {"parts": [{"text": text}]}}
+                for text in texts
+            ]
+        }
+        return url, payload
+
+    @staticmethod
+    def _parse_batch(result: dict | object, count: int) -> dict:
+        """Normalise an API/SDK response to ``{"embeddings": [...]}``."""
+
+        # --- extract embedding vectors regardless of response shape ---
+        def _extract_values(resp: dict | object) -> list[list[float]] | None:
+            # 1) top-level {"embeddings": [{"values": [...] }, ...]}
+            if isinstance(resp, dict) and resp.get("embeddings"):
+                return [e.get("values") for e in resp["embeddings"]]
+
+            # 2) egyelemű {"embedding": {"values": [...]}}
+            if isinstance(resp, dict) and resp.get("embedding"):
+                return [resp["embedding"].get("values")]
+
+            # 3) régi/lapos {"values": [...]}
+            if isinstance(resp, dict) and "values" in resp:
+                return [resp["values"]]
+
+            # 4) predictions listás
+            if isinstance(resp, dict) and resp.get("predictions"):
+                return [
+                    p.get("embedding", {}).get("values") for p in resp["predictions"]
+                ]
+
+            # 5) SDK-objektum (result.embeddings[i].values)
+            if hasattr(resp, "embeddings") and resp.embeddings:
+                return [e.values for e in resp.embeddings]
+
+            return None
+
+        values = _extract_values(result)
+        if values and len(values) == count and all(values):
+            return {
+                "_status_code": 200,
+                "embeddings": [{"values": v} for v in values],
+            }
 
-        # Use a semaphore to enforce rate limiting across threads/async
-        # Initialize with proper type annotation for mypy
-        self._semaphore: Optional[asyncio.Semaphore] = None
-        try:
-            self._semaphore = asyncio.Semaphore(1)
-        except RuntimeError:
-            # Not in an async context
-            pass
+        logger.error("Gemini API unexpected response format: %s", result)
+        # HTTP módban az eredeti státuszkódot adjuk tovább (pl. 429 -> retry)
+        status = result.get("_status_code", 200) if isinstance(result, dict) else 200
+        return {
+            "_status_code": status,
+            "error": {"message": "No embedding in response"},
+        }
+
+    @staticmethod
+    def _batch_error(e: Exception) -> dict:
+        """Map an API exception to a status-coded error result."""
+        if (
+            "quota" in str(e).lower()
+            or "rate" in str(e).lower()
+            or "limit" in str(e).lower()
+        ):
+            # Rate limit vagy quota error esetén 429-et adunk vissza
+            logger.error(f"Gemini API quota or rate limit exceeded: {str(e)}")
+            return {"_status_code": 429, "error": {"message": str(e)}}
+        else:
+            # Egyéb hiba esetén 500-as kód
+            logger.error(f"Gemini API error: {str(e)}")
+            return {"_status_code": 500, "error": {"message": str(e)}}
 
-    def _embed_content(self, text: str) -> dict:
-        """Synchronously embed a single text using Google GenAI SDK or HTTP."""
+    def _embed_batch(self, texts: List[str]) -> dict:
+        """Synchronously embed a batch of texts using Google GenAI SDK or HTTP."""
         try:
             if self.client is None:
-                resp = httpx.post(
-                    f"https://generativelanguage.googleapis.com/v1beta/models/{self.MODEL_NAME}:embedContent",
-                    params={"key": self._api_key},
-                    json={"content": {"parts": [{"text": text}]}},
-                )
+                import httpx
+
+                url, payload = self._batch_request(texts)
+                resp = httpx.post(url, params={"key": self._api_key}, json=payload)
                 result = resp.json()
                 result["_status_code"] = getattr(resp, "status_code", 200)
             else:
                 result = self.client.models.embed_content(
-                    model=self.MODEL_NAME, contents=text
+                    model=self.MODEL_NAME, contents=texts
                 )
+            return self._parse_batch(result, len(texts))
+        except Exception as e:
+            return self._batch_error(e)
 
-            # --- extract embedding vector regardless of response shape ---
-            def _extract_values(resp: dict | object) -> list[float] | None:
-                # 1) régi/lapos {"values": [...]}
-                if isinstance(resp, dict) and "values" in resp:
-                    return resp["values"]
-
-                # 2) új {"embedding": {"values": [...]}}
-                if isinstance(resp, dict) and resp.get("embedding"):
-                    return resp["embedding"].get("values")
-
-                # 3) top-level {"embeddings": [{"values": [...] }]}
-                if isinstance(resp, dict) and resp.get("embeddings"):
-                    first = resp["embeddings"][0]
-                    if isinstance(first, dict) and "values" in first:
-                        return first["values"]
-
-                # 4) predictions listás
-                if isinstance(resp, dict) and resp.get("predictions"):
-                    emb = resp["predictions"][0].get("embedding", {})
-                    return emb.get("values")
-
-                # 5) SDK-objektum (result.embeddings[0].values)
-                if hasattr(resp, "embeddings") and resp.embeddings:
-                    return resp.embeddings[0].values
-
-                return None
+    async def _embed_batch_async(
+        self, texts: List[str], http: httpx.AsyncClient
+    ) -> dict:
+        """Asynchronously embed a batch of texts over the shared ``http`` client.
 
-            values = _extract_values(result)
-            if values:
-                return {"_status_code": 200, "embeddings": [{"values": values}]}
+        Note: A genai SDK nem támogat asyncio-t natively, ezért SDK módban
+        a szinkron metódust futtatjuk a háttérben.
+        """
+        if self.client is not None:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, self._embed_batch, texts)
 
-            logger.error("Gemini API unexpected response format: %s", result)
-            return {
-                "_status_code": 200,
-                "error": {"message": "No embedding in response"},
-            }
+        try:
+            url, payload = self._batch_request(texts)
+            resp = await http.post(url, params={"key": self._api_key}, json=payload)
+            result = resp.json()
+            result["_status_code"] = resp.status_code
+            return self._parse_batch(result, len(texts))
         except Exception as e:
-            if (
-                "quota" in str(e).lower()
-                or "rate" in str(e).lower()
-                or "limit" in str(e).lower()
-            ):
-                # Rate limit vagy quota error esetén 429-et adunk vissza
-                logger.error(f"Gemini API quota or rate limit exceeded: {str(e)}")
-                return {"_status_code": 429, "error": {"message": str(e)}}
-            else:
-                # Egyéb hiba esetén 500-as kód
-                logger.error(f"Gemini API error: {str(e)}")
-                return {"_status_code": 500, "error": {"message": str(e)}}
+            return self._batch_error(e)
 
-    async def _embed_content_async(self, text: str) -> dict:
-        """Asynchronously embed a single text using Google GenAI SDK.
+    def _reserve_slot(self) -> float:
+        """Reserve the next request slot and return how long to wait for it.
 
-        Note: A genai SDK nem támogat asyncio-t natively, ezért
-        ugyanazt a szinkron metódust hívjuk, amit a háttérben futtatunk.
+        Uses the monotonic clock (immune to NTP/wall-clock jumps) and a lock,
+        so threads of the sync pool and tasks of the async path share one
+        RATE_LIMIT budget; callers sleep outside the lock.
         """
-        # Visszaadjuk ugyanazt a szinkron hívást, amit majd task-ként futtatunk
-        return self._embed_content(text)
+        with self._rate_lock:
+            now = time.monotonic()
+            slot = max(now, self._last_request_time + self._min_interval)
+            self._last_request_time = slot
+        return slot - now
 
     def _rate_limit_sync(self) -> None:
         """Apply rate limiting for synchronous calls."""
-        now = time.time()
-        elapsed = now - self._last_request_time
-        wait_time = max(0, self._min_interval - elapsed)
+        wait_time = self._reserve_slot()
         if wait_time > 0:
             time.sleep(wait_time)
-        self._last_request_time = time.time()
 
     async def _rate_limit_async(self) -> None:
         """Apply rate limiting for async calls."""
-        now = time.time()
-        elapsed = now - self._last_request_time
-        wait_time = max(0, self._min_interval - elapsed)
+        wait_time = self._reserve_slot()
         if wait_time > 0:
             await asyncio.sleep(wait_time)
-        self._last_request_time = time.time()
 
+    @property
+    def cache_namespace(self) -> str:
+        return f"gemini:{self.MODEL_NAME}:{self.DIMENSION}"
+
+    @cached_embeddings
     def embed(self, texts: List[str]) -> List[List[float]]:
         """Embed texts using Gemini API with rate limiting and retry logic."""
         logger.info(f"Gemini embedding: count={len(texts)}, dim={self.DIMENSION}")
@@ -333,124 +488,173 @@ class GeminiBackend(BaseEmbeddingBackend):
             return self._embed_sync(texts)
 
     def _embed_sync(self, texts: List[str]) -> List[List[float]]:
-        """Synchronous implementation of embed."""
+        """Synchronous implementation of embed.
+
+        Multiple batches are sent from a small thread pool (httpx releases
+        the GIL while waiting on the network), still paced by the rate limiter.
+        """
+        batches = self._batches(texts)
+        starts = range(0, len(texts), self.BATCH_SIZE)
+        if len(batches) > 1:
+            with ThreadPoolExecutor(
+                max_workers=min(self.MAX_CONCURRENCY, len(batches))
+            ) as pool:
+                outcomes = list(pool.map(self._embed_batch_with_retry, starts, batches))
+        else:
+            outcomes = list(map(self._embed_batch_with_retry, starts, batches))
+
+        return self._merge_batches(texts, batches, outcomes)
+
+    def _embed_batch_with_retry(
+        self, idx: int, batch: List[str]
+    ) -> Optional[List[List[float]]]:
+        """Embed one batch with rate limiting and retries; ``None`` on failure."""
+        for attempt in range(1, self.MAX_RETRIES + 1):
+            # Apply rate limiting
+            self._rate_limit_sync()
+
+            try:
+                data = self._embed_batch(batch)
+                # Csak 429 esetén próbálkozzunk újra
+                status_code = data.pop("_status_code", 200)
+
+                if status_code == 429 and attempt < self.MAX_RETRIES:
+                    wait_time = 2**attempt
+                    logger.warning(
+                        f"Gemini: Rate limited (idx={idx}, attempt={attempt}), retrying in {wait_time}s"
+                    )
+                    time.sleep(wait_time)
+                    continue
+
+                if "embeddings" in data and data["embeddings"]:
+                    return [e.get("values", []) for e in data["embeddings"]]
+                else:
+                    # Más hibák esetén csak naplózunk és megyünk tovább
+                    logger.error(
+                        f"Gemini: API error (idx={idx}) - {data.get('error', {}).get('message', 'No embeddings in response')}"
+                    )
+            except Exception as exc:
+                # Hálózati hibák esetén próbálkozzunk újra
+                if attempt < self.MAX_RETRIES:
+                    wait_time = 2**attempt
+                    logger.warning(
+                        f"Gemini: network error (idx={idx}, attempt={attempt}), retrying in {wait_time}s: {exc}"
+                    )
+                    time.sleep(wait_time)
+                else:
+                    logger.error(
+                        f"Gemini: network error after {self.MAX_RETRIES} attempts (idx={idx}): {exc}"
+                    )
+
+        return None
+
+    def _batches(self, texts: List[str]) -> List[List[str]]:
+        """Split ``texts`` into request-sized batches (batchEmbedContents)."""
+        return [
+            texts[idx : idx + self.BATCH_SIZE]
+            for idx in range(0, len(texts), self.BATCH_SIZE)
+        ]
+
+    @staticmethod
+    def _merge_batches(
+        texts: List[str],
+        batches: List[List[str]],
+        outcomes: List[Optional[List[List[float]]]],
+    ) -> List[List[float]]:
+        """Flatten per-batch vectors in input order; failed batches yield ``[]``."""
         results: List[List[float]] = []
         failed = 0
-
-        for idx, text in enumerate(texts):
-            success = False
-            for attempt in range(1, self.MAX_RETRIES + 1):
-                # Apply rate limiting
-                self._rate_limit_sync()
-
-                try:
-                    data = self._embed_content(text)
-                    # Csak 429 esetén próbálkozzunk újra
-                    status_code = data.pop("_status_code", 200)
-
-                    if status_code == 429 and attempt < self.MAX_RETRIES:
-                        wait_time = 2**attempt
-                        logger.warning(
-                            f"Gemini: Rate limited (idx={idx}, attempt={attempt}), retrying in {wait_time}s"
-                        )
-                        time.sleep(wait_time)
-                        continue
-
-                    if "embeddings" in data and data["embeddings"]:
-                        values = data["embeddings"][0].get("values", [])
-                        results.append(values)
-                        success = True
-                        break
-                    else:
-                        # Más hibák esetén csak naplózunk és megyünk tovább
-                        logger.error(
-                            f"Gemini: API error (idx={idx}) - {data.get('error', {}).get('message', 'No embeddings in response')}"
-                        )
-                except Exception as exc:
-                    # Hálózati hibák esetén próbálkozzunk újra
-                    if attempt < self.MAX_RETRIES:
-                        wait_time = 2**attempt
-                        logger.warning(
-                            f"Gemini: network error (idx={idx}, attempt={attempt}), retrying in {wait_time}s: {exc}"
-                        )
-                        time.sleep(wait_time)
-                    else:
-                        logger.error(
-                            f"Gemini: network error after {self.MAX_RETRIES} attempts (idx={idx}): {exc}"
-                        )
-
-            if not success:
-                results.append([])
-                failed += 1
+        for batch, vectors in zip(batches, outcomes):
+            if vectors is None:
+                results.extend([] for _ in batch)
+                failed += len(batch)
+            else:
+                results.extend(vectors)
 
         logger.info(f"Gemini embedding done: total={len(texts)}, failed={failed}")
         return results
 
     async def _embed_async(self, texts: List[str]) -> List[List[float]]:
-        """Asynchronous implementation of embed."""
-        results: List[List[float]] = []
-        failed = 0
+        """Asynchronous implementation of embed.
 
-        for idx, text in enumerate(texts):
-            success = False
-            for attempt in range(1, self.MAX_RETRIES + 1):
-                # Apply rate limiting with semaphore if available
-                if self._semaphore is not None:
-                    async with self._semaphore:
-                        await self._rate_limit_async()
+        Batches run concurrently (at most MAX_CONCURRENCY in flight) over one
+        shared AsyncClient, still paced by the rate limiter.
+        """
+        import httpx
+
+        batches = self._batches(texts)
+        sem = asyncio.Semaphore(self.MAX_CONCURRENCY)
+
+        async with httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=self.MAX_CONCURRENCY)
+        ) as http:
+
+            async def one(idx: int, batch: List[str]) -> Optional[List[List[float]]]:
+                async with sem:
+                    return await self._embed_batch_with_retry_async(idx, batch, http)
+
+            outcomes = await asyncio.gather(
+                *(one(n * self.BATCH_SIZE, batch) for n, batch in enumerate(batches))
+            )
+
+        return self._merge_batches(texts, batches, outcomes)
+
+    async def _embed_batch_with_retry_async(
+        self, idx: int, batch: List[str], http: httpx.AsyncClient
+    ) -> Optional[List[List[float]]]:
+        """Embed one batch with rate limiting and retries; ``None`` on failure."""
+        for attempt in range(1, self.MAX_RETRIES + 1):
+            await self._rate_limit_async()
+
+            try:
+                data = await self._embed_batch_async(batch, http)
+
+                # Csak 429 esetén próbálkozzunk újra
+                status_code = data.pop("_status_code", 200)
+
+                if status_code == 429 and attempt < self.MAX_RETRIES:
+                    wait_time = 2**attempt
+                    logger.warning(
+                        f"Gemini: Rate limited (idx={idx}, attempt={attempt}), retrying in {wait_time}s"
+                    )
+                    await asyncio.sleep(wait_time)
+                    continue
+
+                if "embeddings" in data and data["embeddings"]:
+                    return [e.get("values", []) for e in data["embeddings"]]
+                else:
+                    # Más hibák esetén csak naplózunk és megyünk tovább
+                    logger.error(
+                        f"Gemini: API error (idx={idx}) - {data.get('error', {}).get('message', 'No embeddings in response')}"
+                    )
+            except Exception as exc:
+                # Hálózati hibák esetén próbálkozzunk újra
+                if attempt < self.MAX_RETRIES:
+                    wait_time = 2**attempt
+                    logger.warning(
+                        f"Gemini: network error (idx={idx}, attempt={attempt}), retrying in {wait_time}s: {exc}"
+                    )
+                    await asyncio.sleep(wait_time)
                 else:
-                    await self._rate_limit_async()
-
-                # Használjuk az asyncio.to_thread segítségével a szinkron metódust
-                # mivel a genai SDK nem támogatja natively az asyncio-t
-                try:
-                    loop = asyncio.get_event_loop()
-                    data = await loop.run_in_executor(None, self._embed_content, text)
-
-                    # Csak 429 esetén próbálkozzunk újra
-                    status_code = data.pop("_status_code", 200)
-
-                    if status_code == 429 and attempt < self.MAX_RETRIES:
-                        wait_time = 2**attempt
-                        logger.warning(
-                            f"Gemini: Rate limited (idx={idx}, attempt={attempt}), retrying in {wait_time}s"
-                        )
-                        await asyncio.sleep(wait_time)
-                        continue
-
-                    if "embeddings" in data and data["embeddings"]:
-                        values = data["embeddings"][0].get("values", [])
-                        results.append(values)
-                        success = True
-                        break
-                    else:
-                        # Más hibák esetén csak naplózunk és megyünk tovább
-                        logger.error(
-                            f"Gemini: API error (idx={idx}) - {data.get('error', {}).get('message', 'No embeddings in response')}"
-                        )
-                except Exception as exc:
-                    # Hálózati hibák esetén próbálkozzunk újra
-                    if attempt < self.MAX_RETRIES:
-                        wait_time = 2**attempt
-                        logger.warning(
-                            f"Gemini: network error (idx={idx}, attempt={attempt}), retrying in {wait_time}s: {exc}"
-                        )
-                        await asyncio.sleep(wait_time)
-                    else:
-                        logger.error(
-                            f"Gemini: network error after {self.MAX_RETRIES} attempts (idx={idx}): {exc}"
-                        )
-
-            if not success:
-                results.append([])
-                failed += 1
+                    logger.error(
+                        f"Gemini: network error after {self.MAX_RETRIES} attempts (idx={idx}): {exc}"
+                    )
 
-        logger.info(f"Gemini embedding done: total={len(texts)}, failed={failed}")
-        return results
+        return None
 
 
 def get_backend(name: str) -> BaseEmbeddingBackend:
-    name = name.lower()
+    """Return the process-wide backend instance for ``name``.
+
+    Backends are built once and shared (call ``_get_backend.cache_clear()`` to
+    rebuild, e.g. after changing their environment in tests).
+    """
+    return _get_backend(name.lower())
+
+
+@lru_cache(maxsize=None)
+def _get_backend(name: str) -> BaseEmbeddingBackend:
+    """Build the backend for an already lower-cased ``name``."""
     if name == "openai":
         return OpenAIBackend()
     if name == "gemini":
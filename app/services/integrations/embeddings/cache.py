@@ -0,0 +1,226 @@
+"""Content-addressed embedding cache shared by the embedding backends.
+
+Vectors are keyed by ``(model namespace, blake2b(text))`` and kept in two
+tiers: a bounded in-process LRU and an optional SQLite file that survives
+restarts (re-indexing, repeated queries and prompt prefixes hit it). The file
+is bounded too: rows carry a last-used timestamp and the least recently used
+ones are pruned once it grows past its row limit.
+"""
+
+from __future__ import annotations
+
+import functools
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from cachetools import LRUCache
+
+from ha_rag_bridge.logging import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_CACHE_PATH = "~/.cache/ha-rag/emb.sqlite"
+DEFAULT_MEMORY_ITEMS = 4096
+DEFAULT_MAX_ROWS = 100_000
+
+# Writes between two prunes of the disk tier
+_PRUNE_EVERY = 1000
+
+# SQLite caps the number of bound parameters per statement
+_SQL_CHUNK = 500
+
+
+def _key(text: str) -> bytes:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
+class EmbeddingCache:
+    """Two-tier (memory LRU + optional SQLite) embedding vector cache.
+
+    Vectors are stored as float32 arrays, far smaller than lists of Python
+    floats; local model output is float32 already, API vectors are rounded to
+    float32 precision (well below what cosine ranking can notice).
+    """
+
+    def __init__(
+        self,
+        path: Optional[str],
+        max_memory_items: int = DEFAULT_MEMORY_ITEMS,
+        max_rows: int = DEFAULT_MAX_ROWS,
+    ) -> None:
+        self._memory: LRUCache = LRUCache(maxsize=max_memory_items)
+        self._max_rows = max_rows
+        # The memory tier and the SQLite connection are guarded separately, so
+        # disk I/O never blocks lookups that memory can answer
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._writes_since_prune = 0
+        self._db: Optional[sqlite3.Connection] = None
+        if path:
+            try:
+                db_path = Path(path).expanduser()
+                db_path.parent.mkdir(parents=True, exist_ok=True)
+                db = sqlite3.connect(db_path, check_same_thread=False)
+                db.execute("PRAGMA journal_mode=WAL")
+                db.execute(
+                    "CREATE TABLE IF NOT EXISTS emb ("
+                    "model TEXT NOT NULL, k BLOB NOT NULL, vec BLOB NOT NULL, "
+                    "used INTEGER NOT NULL, PRIMARY KEY (model, k)) WITHOUT ROWID"
+                )
+                db.execute("CREATE INDEX IF NOT EXISTS emb_used ON emb (used)")
+                db.commit()
+                self._db = db
+            except (OSError, sqlite3.Error) as exc:
+                logger.warning(
+                    "Embedding disk cache unavailable, using memory only",
+                    path=path,
+                    error=str(exc),
+                )
+
+    def get_many(self, model: str, keys: Sequence[bytes]) -> List[Optional[array]]:
+        """Look up ``keys``; misses are ``None``. Disk hits are promoted to memory."""
+        with self._lock:
+            found: List[Optional[array]] = [
+                self._memory.get((model, key)) for key in keys
+            ]
+        missing = list({key for key, vec in zip(keys, found) if vec is None})
+        if not missing or self._db is None:
+            return found
+
+        from_disk = self._read_disk(model, missing)
+        if from_disk:
+            with self._lock:
+                for key, vec in from_disk.items():
+                    self._memory[(model, key)] = vec
+
+        return [
+            vec if vec is not None else from_disk.get(key)
+            for key, vec in zip(keys, found)
+        ]
+
+    def put_many(self, model: str, items: Sequence[Tuple[bytes, List[float]]]) -> None:
+        """Store freshly computed vectors in both tiers."""
+        packed = [(key, array("f", vec)) for key, vec in items]
+        with self._lock:
+            for key, vec in packed:
+                self._memory[(model, key)] = vec
+        if self._db is None or not packed:
+            return
+
+        now = int(time.time())
+        with self._db_lock:
+            try:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO emb (model, k, vec, used) "
+                    "VALUES (?, ?, ?, ?)",
+                    [(model, key, vec.tobytes(), now) for key, vec in packed],
+                )
+                self._writes_since_prune += len(packed)
+                if self._writes_since_prune >= _PRUNE_EVERY:
+                    self._prune()
+                self._db.commit()
+            except sqlite3.Error as exc:
+                logger.warning("Embedding disk cache write failed", error=str(exc))
+
+    def _read_disk(self, model: str, keys: List[bytes]) -> Dict[bytes, array]:
+        """Fetch ``keys`` from SQLite and mark the hits as used now."""
+        assert self._db is not None
+        from_disk: Dict[bytes, array] = {}
+        now = int(time.time())
+        with self._db_lock:
+            try:
+                for start in range(0, len(keys), _SQL_CHUNK):
+                    chunk = keys[start : start + _SQL_CHUNK]
+                    rows = self._db.execute(
+                        "SELECT k, vec FROM emb WHERE model = ? AND k IN (%s)"
+                        % ",".join("?" * len(chunk)),
+                        (model, *chunk),
+                    ).fetchall()
+                    for key, blob in rows:
+                        vec = array("f")
+                        vec.frombytes(blob)
+                        from_disk[key] = vec
+                    if rows:
+                        self._db.execute(
+                            "UPDATE emb SET used = ? WHERE model = ? AND k IN (%s)"
+                            % ",".join("?" * len(rows)),
+                            (now, model, *(key for key, _ in rows)),
+                        )
+                if from_disk:
+                    self._db.commit()
+            except sqlite3.Error as exc:
+                logger.warning("Embedding disk cache read failed", error=str(exc))
+        return from_disk
+
+    def _prune(self) -> None:
+        """Delete the least recently used rows beyond ``max_rows``.
+
+        Called with the database lock held. Vectors served from the memory tier
+        don't refresh their row, so eviction order on disk is approximate.
+        """
+        assert self._db is not None
+        self._writes_since_prune = 0
+        self._db.execute(
+            "DELETE FROM emb WHERE used < "
+            "(SELECT used FROM emb ORDER BY used DESC LIMIT 1 OFFSET ?)",
+            (self._max_rows - 1,),
+        )
+
+
+@functools.lru_cache(maxsize=1)
+def get_embedding_cache() -> EmbeddingCache:
+    """Process-wide cache configured from the environment.
+
+    ``EMBEDDING_CACHE_PATH`` selects the SQLite file (empty disables the disk
+    tier); ``EMBEDDING_CACHE_SIZE`` bounds the in-memory tier and
+    ``EMBEDDING_CACHE_MAX_ROWS`` the disk tier.
+    """
+    return EmbeddingCache(
+        os.getenv("EMBEDDING_CACHE_PATH", DEFAULT_CACHE_PATH),
+        max_memory_items=int(
+            os.getenv("EMBEDDING_CACHE_SIZE", str(DEFAULT_MEMORY_ITEMS))
+        ),
+        max_rows=int(os.getenv("EMBEDDING_CACHE_MAX_ROWS", str(DEFAULT_MAX_ROWS))),
+    )
+
+
+EmbedFn = Callable[..., List[List[float]]]
+
+
+def cached_embeddings(embed: EmbedFn) -> EmbedFn:
+    """Serve repeated texts of a backend's ``embed`` from the embedding cache.
+
+    Only distinct cache misses are passed to the wrapped method; the backend
+    provides ``cache_namespace`` (model name and dimension) to keep vectors of
+    different models apart. Empty vectors (failed requests) are not cached.
+    """
+
+    @functools.wraps(embed)
+    def wrapper(self, texts: List[str]) -> List[List[float]]:
+        cache = get_embedding_cache()
+        namespace = self.cache_namespace
+        keys = [_key(text) for text in texts]
+        hits = cache.get_many(namespace, keys)
+
+        missing: Dict[bytes, str] = {}
+        for key, text, hit in zip(keys, texts, hits):
+            if hit is None:
+                missing.setdefault(key, text)
+
+        computed: Dict[bytes, List[float]] = {}
+        if missing:
+            computed = dict(zip(missing, embed(self, list(missing.values()))))
+            cache.put_many(namespace, [(k, v) for k, v in computed.items() if v])
+
+        return [
+            hit.tolist() if hit is not None else computed[key]
+            for key, hit in zip(keys, hits)
+        ]
+
+    return wrapper
@@ -19,6 +19,7 @@ from typing import TYPE_CHECKING, List, Dict, Optional
 from datetime import datetime
 
 import httpx
+import orjson
 from litellm.integrations.custom_logger import CustomLogger
 
 if TYPE_CHECKING:
@@ -404,16 +405,17 @@ class HARagHookEnhanced(CustomLogger):
                     },
                 }
 
-                logger.debug(
-                    f"🌉 ENHANCED: Bridge payload: {json.dumps(bridge_payload, indent=2)[:500]}..."
-                )
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(
+                        f"🌉 ENHANCED: Bridge payload: {json.dumps(bridge_payload, indent=2)[:500]}..."
+                    )
 
                 response = await client.post(
                     f"{HA_RAG_API_URL}/process-conversation", json=bridge_payload
                 )
 
                 if response.status_code == 200:
-                    result = response.json()
+                    result = orjson.loads(response.content)
                     formatted_context = result.get("formatted_content", "")
 
                     if formatted_context and formatted_context.strip():
@@ -443,8 +445,10 @@ class HARagHookEnhanced(CustomLogger):
                             f"ℹ️ ENHANCED: Bridge returned empty context for {format_type} with {len(conversation_to_send)} messages"
                         )
                 else:
+                    # Decode only the preview bytes, not the whole error body
+                    body_preview = response.content[:200].decode("utf-8", "replace")
                     logger.error(
-                        f"❌ ENHANCED: Bridge call failed: {response.status_code} - {response.text[:200]}"
+                        f"❌ ENHANCED: Bridge call failed: {response.status_code} - {body_preview}"
                     )
 
         except Exception as e:
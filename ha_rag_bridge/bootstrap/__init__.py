@@ -10,7 +10,7 @@ from .naming import safe_create_collection, is_valid, to_valid_name
 from ha_rag_bridge.utils.env import env_true
 from ha_rag_bridge.logging import get_logger
 
-SCHEMA_LATEST = 4
+SCHEMA_LATEST = 5
 
 logger = get_logger(__name__)
 
@@ -120,7 +120,10 @@ def _bootstrap_impl(
         meta_col.insert({"_key": "schema_version", "value": 0})
         version = 0
     else:
-        version = int(getattr(doc, "value", 0))
+        # python-arango returns documents as dicts; getattr() on one always fell
+        # back to 0 and re-ran every migration on each start
+        value = doc.get("value", 0) if isinstance(doc, dict) else doc.value
+        version = int(value)
 
     if version < SCHEMA_LATEST:
         for num in range(version + 1, SCHEMA_LATEST + 1):
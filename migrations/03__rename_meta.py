@@ -1,10 +1,11 @@
 from ha_rag_bridge.bootstrap.naming import safe_rename
 
+# Legacy underscore-prefixed system collections and their current names
+RENAMES = (("_meta", "meta"), ("_bootstrap_log", "bootstrap_log"))
+
 
 def run(db):
-    col = db.get_col("_meta")
-    if col:
-        safe_rename(col, "meta")
-    col = db.get_col("_bootstrap_log")
-    if col:
-        safe_rename(col, "bootstrap_log")
+    for old, new in RENAMES:
+        col = db.get_col(old)
+        if col:
+            safe_rename(col, new)
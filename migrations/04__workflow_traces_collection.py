@@ -4,97 +4,236 @@ ArangoDB Migration: Create workflow_traces collection
 Adds collection for comprehensive workflow debugging and visualization.
 """
 
-from arango import ArangoClient
+from dataclasses import dataclass
+from functools import lru_cache
+from types import MappingProxyType
+from typing import TYPE_CHECKING
+
 import os
 import sys
 
+from ha_rag_bridge.logging import get_logger
 
-def create_workflow_traces_collection(db):
-    """Create workflow_traces collection with indexes."""
-    from ha_rag_bridge.logging import get_logger
+if TYPE_CHECKING:
+    from arango import ArangoClient
 
-    logger = get_logger(__name__)
+logger = get_logger(__name__)
 
-    collection_name = "workflow_traces"
 
-    # Create collection if it doesn't exist
-    if not db.has_collection(collection_name):
-        collection = db.create_collection(collection_name)
-        logger.info(f"Created collection: {collection_name}")
-    else:
-        collection = db.collection(collection_name)
-        logger.info(f"Collection {collection_name} already exists")
-
-    # Create indexes for efficient queries
-    indexes_to_create = [
+# Indexes for efficient queries. hash/skiplist are both persistent indexes on
+# RocksDB, so the composites below serve the dashboard filters (by session, by
+# status) with sorted/ranged second fields in one index each.
+_INDEXES_TO_CREATE = (
+    MappingProxyType(
         {
-            "type": "hash",
-            "fields": ["session_id"],
-            "name": "idx_session_id",
+            "type": "persistent",
+            "fields": ["session_id", "start_time"],
+            "name": "idx_session_start",
             "unique": False,
-        },
+            # Columns the trace list projects, so those queries never fetch the
+            # (large) trace documents themselves
+            "storedValues": ["status", "total_duration_ms", "user_query"],
+        }
+    ),
+    MappingProxyType(
         {
-            "type": "skiplist",
-            "fields": ["start_time"],
-            "name": "idx_start_time",
+            "type": "persistent",
+            "fields": ["status", "total_duration_ms"],
+            "name": "idx_status_duration",
             "unique": False,
-        },
-        {"type": "hash", "fields": ["status"], "name": "idx_status", "unique": False},
+        }
+    ),
+    # Alert dashboards: FILTER t.error_at != null SORT t.error_at DESC
+    MappingProxyType(
         {
-            "type": "skiplist",
-            "fields": ["total_duration_ms"],
-            "name": "idx_duration",
+            "type": "persistent",
+            "fields": ["error_at"],
+            "name": "idx_errors",
             "unique": False,
-        },
+            "sparse": True,
+        }
+    ),
+    # Recency ordering across all sessions (the TTL index isn't used for sorts)
+    MappingProxyType(
         {
-            "type": "fulltext",
-            "fields": ["user_query"],
-            "name": "idx_user_query",
-            "min_length": 2,
-        },
-    ]
+            "type": "persistent",
+            "fields": ["start_time"],
+            "name": "idx_start_time",
+            "unique": False,
+        }
+    ),
+    # Automatic cleanup after 30 days; start_time stays the ISO 8601 string the
+    # admin UI parses, TTL indexes accept date strings as well as numbers
+    MappingProxyType(
+        {
+            "type": "ttl",
+            "fields": ["start_time"],
+            "name": "idx_ttl_cleanup",
+            "expireAfter": 2592000,  # 30 days in seconds
+        }
+    ),
+)
+
+# error_at is only set on failed traces, so the sparse idx_errors below holds
+# just those rows instead of one entry per trace
+COMPUTED_VALUES = [
+    {
+        "name": "error_at",
+        "expression": "RETURN @doc.status == 'error' ? @doc.start_time : null",
+        "overwrite": True,
+        "computeOn": ["insert", "update", "replace"],
+    }
+]
+
+
+@dataclass(frozen=True)
+class ArangoEnv:
+    """Connection settings for running the migration standalone."""
+
+    url: str
+    db_name: str
+    username: str
+    password: str
+
+
+@lru_cache(maxsize=1)
+def _env() -> ArangoEnv:
+    """Read the connection settings once per process."""
+    return ArangoEnv(
+        url=os.environ["ARANGO_URL"],
+        db_name=os.getenv("ARANGO_DB", "_system"),
+        username=os.environ["ARANGO_USER"],
+        password=os.environ["ARANGO_PASS"],
+    )
+
+
+@lru_cache(maxsize=1)
+def _client() -> "ArangoClient":
+    """Return the process-wide client, so repeated main() calls share it.
+
+    Its HTTP client keeps one keep-alive session per host, so every call of
+    the migration reuses the same sockets instead of reconnecting. The driver
+    is imported here: the bootstrap only calls run() with its own database.
+    """
+    from arango import ArangoClient
+    from arango.http import DefaultHTTPClient
+
+    http_client = DefaultHTTPClient(pool_connections=1, pool_maxsize=10)
+    return ArangoClient(hosts=_env().url, http_client=http_client)
+
+
+def create_workflow_traces_collection(db, bulk_load_mode: bool = False):
+    """Create workflow_traces collection with indexes.
+
+    With ``bulk_load_mode`` only the collection is created; load the data first
+    and then call :func:`create_workflow_traces_indexes`, so each index is built
+    once over the loaded documents instead of being maintained per insert.
+    """
+    collection_name = "workflow_traces"
+
+    # Create collection if it doesn't exist
+    if not db.has_collection(collection_name):
+        # In a cluster, spread traces over the DB-servers by session instead of
+        # funnelling every insert through a single shard
+        sharding = {}
+        if db.role() == "COORDINATOR":
+            sharding = {
+                "shard_count": 8,
+                "shard_fields": ["session_id"],
+                "replication_factor": 2,
+            }
+        db.create_collection(
+            collection_name,
+            computedValues=COMPUTED_VALUES,
+            **sharding,
+        )
+        logger.info(f"Created collection: {collection_name}")
+    else:
+        # Collections created by an earlier version of this migration are
+        # brought up to date by migration 05
+        logger.info(f"Collection {collection_name} already exists")
+
+    if bulk_load_mode:
+        logger.info(f"Deferring index creation on {collection_name} until loaded")
+        return
+
+    create_workflow_traces_indexes(db)
+
+
+def create_workflow_traces_indexes(db):
+    """Create the workflow_traces indexes and search view."""
+    collection_name = "workflow_traces"
+    collection = db.collection(collection_name)
 
     # Get existing indexes
-    existing_indexes = {idx["name"] for idx in collection.indexes()}
-
-    # Create missing indexes
-    for index_def in indexes_to_create:
-        if index_def["name"] not in existing_indexes:
-            try:
-                collection.add_index(index_def)
-                logger.info(
-                    f"Created index: {index_def['name']} on {index_def['fields']}"
-                )
-            except Exception as e:
-                logger.error(f"Failed to create index {index_def['name']}: {e}")
-        else:
+    existing_indexes = {idx["name"]: idx for idx in collection.indexes()}
+
+    missing = [d for d in _INDEXES_TO_CREATE if d["name"] not in existing_indexes]
+    for index_def in _INDEXES_TO_CREATE:
+        if index_def["name"] in existing_indexes:
             logger.info(f"Index {index_def['name']} already exists")
 
-    # Create TTL index for automatic cleanup (30 days)
-    ttl_index_name = "idx_ttl_cleanup"
-    if ttl_index_name not in existing_indexes:
+    # Queue the missing indexes and submit them concurrently (python-arango runs
+    # batch jobs on a thread pool of max_workers) instead of one round-trip after
+    # another; failures are reported per job after the commit. On an already
+    # migrated collection nothing is queued and no batch is opened.
+    jobs = []
+    if missing:
+        with db.begin_batch_execution(max_workers=len(missing)) as batch_db:
+            batch_collection = batch_db.collection(collection_name)
+            jobs = [(d, batch_collection.add_index(dict(d))) for d in missing]
+
+    created, failed = [], []
+    for index_def, job in jobs:
+        try:
+            created.append(job.result())
+            logger.info(f"Created index: {index_def['name']} on {index_def['fields']}")
+        except Exception as e:
+            failed.append(index_def["name"])
+            logger.error(f"Failed to create index {index_def['name']}: {e}")
+
+    # Index creation can't run inside an Arango transaction, so undo this run's
+    # indexes by hand: the collection is left with all of them or none, and the
+    # failed migration is retried as a whole on the next bootstrap
+    if failed:
+        for index in created:
+            collection.delete_index(index["id"])
+        raise RuntimeError(f"Failed to create indexes: {', '.join(failed)}")
+
+    # Text search on user_query uses an ArangoSearch view (inverted index) rather
+    # than the deprecated fulltext index:
+    #   FOR t IN v_workflow_traces
+    #     SEARCH ANALYZER(t.user_query IN TOKENS(@q, "text_en"), "text_en")
+    #     SORT t.start_time DESC LIMIT 20
+    # The view stores documents newest first (primarySort), so that SORT is
+    # answered from the view order instead of sorting every match
+    view_name = "v_workflow_traces"
+    if view_name not in {view["name"] for view in db.views()}:
         try:
-            collection.add_index(
-                {
-                    "type": "ttl",
-                    "fields": ["start_time"],
-                    "name": ttl_index_name,
-                    "expireAfter": 2592000,  # 30 days in seconds
-                }
+            db.create_arangosearch_view(
+                view_name,
+                properties={
+                    "primarySort": [{"field": "start_time", "direction": "desc"}],
+                    "primarySortCompression": "lz4",
+                    "links": {
+                        collection_name: {
+                            "includeAllFields": False,
+                            "storeValues": "none",
+                            "fields": {"user_query": {"analyzers": ["text_en"]}},
+                            "features": ["frequency", "norm", "position"],
+                        }
+                    },
+                },
             )
-            logger.info(f"Created TTL index: {ttl_index_name} (30 day cleanup)")
+            logger.info(f"Created ArangoSearch view: {view_name} on user_query")
         except Exception as e:
-            logger.error(f"Failed to create TTL index: {e}")
+            logger.error(f"Failed to create view {view_name}: {e}")
     else:
-        logger.info(f"TTL index {ttl_index_name} already exists")
+        logger.info(f"View {view_name} already exists")
 
 
 def run(db):
     """Bootstrap-compatible migration function."""
-    from ha_rag_bridge.logging import get_logger
-
-    logger = get_logger(__name__)
-
     try:
         # Create workflow_traces collection
         create_workflow_traces_collection(db)
@@ -110,15 +249,10 @@ def main():
 
     try:
         # Connect to ArangoDB
-        arango = ArangoClient(hosts=os.environ["ARANGO_URL"])
-        db_name = os.getenv("ARANGO_DB", "_system")
-        db = arango.db(
-            db_name,
-            username=os.environ["ARANGO_USER"],
-            password=os.environ["ARANGO_PASS"],
-        )
+        env = _env()
+        db = _client().db(env.db_name, username=env.username, password=env.password)
 
-        print(f"🔗 Connected to ArangoDB database: {db_name}")
+        print(f"🔗 Connected to ArangoDB database: {env.db_name}")
 
         # Run the migration
         run(db)
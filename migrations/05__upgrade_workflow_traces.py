@@ -0,0 +1,73 @@
+"""
+ArangoDB Migration: Upgrade an existing workflow_traces collection
+Brings collections created by the original migration 04 in line with its
+current definitions: computed values, composite indexes and the search
+view, then drops the indexes those replace.
+"""
+
+import importlib.util
+from pathlib import Path
+
+from ha_rag_bridge.logging import get_logger
+
+logger = get_logger(__name__)
+
+COLLECTION_NAME = "workflow_traces"
+
+# Single-field indexes superseded by migration 04's composites
+_LEGACY_INDEXES = ("idx_session_id", "idx_status", "idx_duration")
+
+# min_length=2 fulltext index, replaced by the v_workflow_traces view
+_FULLTEXT_INDEX = "idx_user_query"
+_VIEW_NAME = "v_workflow_traces"
+
+
+def _migration_04():
+    """Load migration 04, which holds the current workflow_traces definitions."""
+    path = Path(__file__).with_name("04__workflow_traces_collection.py")
+    spec = importlib.util.spec_from_file_location("migration_04", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def upgrade_workflow_traces(db):
+    """Configure, re-index and prune a workflow_traces collection in place."""
+    if not db.has_collection(COLLECTION_NAME):
+        logger.info(f"No {COLLECTION_NAME} collection to upgrade")
+        return
+
+    m04 = _migration_04()
+    collection = db.collection(COLLECTION_NAME)
+
+    if not collection.properties().get("computedValues"):
+        collection.configure(computed_values=m04.COMPUTED_VALUES)
+        logger.info(f"Added error_at computed value to {COLLECTION_NAME}")
+
+    # Builds only what is missing and raises if an index can't be created, so
+    # nothing below is dropped before its replacement exists
+    m04.create_workflow_traces_indexes(db)
+
+    existing_indexes = {idx["name"]: idx for idx in collection.indexes()}
+    obsolete = list(_LEGACY_INDEXES)
+    if _VIEW_NAME in {view["name"] for view in db.views()}:
+        obsolete.append(_FULLTEXT_INDEX)
+
+    for name in obsolete:
+        if name in existing_indexes:
+            try:
+                collection.delete_index(existing_indexes[name]["id"])
+                logger.info(f"Dropped superseded index: {name}")
+            except Exception as e:
+                logger.error(f"Failed to drop index {name}: {e}")
+
+
+def run(db):
+    """Bootstrap-compatible migration function."""
+    try:
+        upgrade_workflow_traces(db)
+        logger.info("Migration 05: workflow_traces upgrade completed")
+
+    except Exception as e:
+        logger.error(f"Migration 05 failed: {e}")
+        raise
@@ -22,11 +22,7 @@ import json
 from ha_rag_bridge import query
 
 question = "Melyik eszköz felelős a hibrid rag-bridge-ért?"
-response = query(question)
 
-print(json.dumps(response, indent=2, ensure_ascii=False))
-
-# %%
 top_k = 5
 response = query(question, top_k=top_k)
 print(json.dumps(response, indent=2, ensure_ascii=False))
@@ -13,23 +13,25 @@ The advisor performs the following analyses:
 from __future__ import annotations
 
 import os
+import sys
 import argparse
-import json
-from datetime import datetime
-from typing import Dict, List, Optional, Any
-from dataclasses import dataclass, field
+import operator
+from collections import Counter
+from functools import lru_cache
+from datetime import datetime, timezone
+from typing import BinaryIO, Dict, Iterator, List, Optional, Any, Set
+from dataclasses import dataclass, field, replace
 from enum import Enum
 import re
 
-import httpx
-from arango import ArangoClient
+import orjson
+from rich.cells import cell_len
 from rich.console import Console
 from rich.table import Table
 from rich.panel import Panel
 from rich.progress import Progress, SpinnerColumn, TextColumn
 
 from ha_rag_bridge.logging import get_logger
-from ha_rag_bridge.settings import HTTP_TIMEOUT
 from app.services.integrations.embeddings.friendly_name_generator import (
     FriendlyNameGenerator,
 )
@@ -37,6 +39,106 @@ from app.services.integrations.embeddings.friendly_name_generator import (
 logger = get_logger(__name__)
 console = Console()
 
+# Generic naming patterns, fused into one alternation per check so each name is
+# tested by a single compiled match
+_GENERIC_FRIENDLY_NAME_RE = re.compile(
+    "|".join(
+        f"(?:{pattern})"
+        for pattern in (
+            r"^[A-Z0-9_-]+$",  # ALL_CAPS_WITH_UNDERSCORES
+            r"^(sensor|switch|light|climate)\d*$",  # Just domain + number
+            r"^device\d*$",  # Generic "device" names
+            r"^unnamed",  # Unnamed devices
+        )
+    ),
+    re.IGNORECASE,
+)
+_GENERIC_DEVICE_NAME_RE = re.compile(
+    "|".join(
+        f"(?:{pattern})"
+        for pattern in (
+            r"^[A-F0-9]{12}$",  # MAC addresses
+            r"^device\d*$",  # Generic "device" names
+            r"^[A-Z0-9_-]+$",  # ALL_CAPS_WITH_UNDERSCORES
+            r"^unnamed",  # Unnamed devices
+            r"^\d+\.\d+\.\d+\.\d+$",  # IP addresses
+        )
+    ),
+    re.IGNORECASE,
+)
+
+# Entity fields read by the analyses, unpacked with one itemgetter call; the
+# defaults are filled in when the data is indexed so every key is present
+_ENTITY_DEFAULTS = {
+    "entity_id": "",
+    "area_id": None,
+    "device_id": None,
+    "friendly_name": "",
+    "device_class": "",
+    "unit_of_measurement": "",
+}
+_ENTITY_FIELDS = operator.itemgetter(
+    "entity_id", "area_id", "device_id", "friendly_name", "device_class"
+)
+
+# Map common patterns to device classes; earlier classes win when several match
+_DEVICE_CLASS_KEYWORDS = {
+    "temperature": ["°c", "celsius", "temp", "hőmérséklet"],
+    "humidity": ["%", "humidity", "páratartalom", "nedvesség"],
+    "power": ["w", "watt", "power", "fogyasztás"],
+    "energy": ["kwh", "energy", "energia"],
+    "illuminance": ["lx", "lux", "light", "fény"],
+    "pressure": ["hpa", "mbar", "pressure", "nyomás"],
+    "battery": ["battery", "akkumulátor"],
+}
+# One scan finds every class with a keyword in the text: each alternative is a
+# lookahead, so keywords overlapping another match (the "w" in "kwh") still hit
+_DEVICE_CLASS_RE = re.compile(
+    "|".join(
+        f"(?=(?P<{device_class}>{'|'.join(map(re.escape, keywords))}))"
+        for device_class, keywords in _DEVICE_CLASS_KEYWORDS.items()
+    )
+)
+
+# Basic friendly-name suggestions based on keywords in the object id
+_FRIENDLY_NAME_SUGGESTIONS = {
+    "temperature": "Temperature Sensor",
+    "humidity": "Humidity Sensor",
+    "power": "Power Monitor",
+    "energy": "Energy Meter",
+    "light": "Light",
+    "switch": "Switch",
+}
+
+
+# The naming checks are pure functions of their strings; template-generated
+# entities repeat the same names and object ids, so results are memoized
+@lru_cache(maxsize=4096)
+def _is_poor_friendly_name(friendly_name: str, object_id: str) -> bool:
+    """Check if friendly name is generic or unclear"""
+    # Only the "unnamed" prefix pattern can match a name containing a space,
+    # so typical multi-word names skip the regex entirely
+    if " " not in friendly_name or friendly_name[:7].lower() == "unnamed":
+        if _GENERIC_FRIENDLY_NAME_RE.match(friendly_name):
+            return True
+
+    # Check if friendly name is too similar to the entity_id's object id
+    name_clean = friendly_name.lower().replace(" ", "_").replace("-", "_")
+
+    return name_clean == object_id.lower()
+
+
+@lru_cache(maxsize=4096)
+def _suggest_friendly_name(object_id: str) -> str:
+    """Suggest a better friendly name"""
+    object_id_lower = object_id.lower()
+    for keyword, suggestion in _FRIENDLY_NAME_SUGGESTIONS.items():
+        if keyword in object_id_lower:
+            return suggestion
+
+    # Fallback: capitalize and clean up entity name
+    return object_id.replace("_", " ").title()
+
 
 class IssueLevel(Enum):
     """Issue severity levels"""
@@ -61,7 +163,16 @@ class IssueCategory(Enum):
     REDUNDANT_AREA = "redundant_area"
 
 
-@dataclass
+# Console colour per severity, shared by the summary table and issue list
+_LEVEL_COLORS = {
+    IssueLevel.CRITICAL: "red",
+    IssueLevel.ERROR: "red",
+    IssueLevel.WARNING: "yellow",
+    IssueLevel.INFO: "blue",
+}
+
+
+@dataclass(slots=True)
 class ConfigIssue:
     """Represents a configuration issue with actionable recommendations"""
 
@@ -79,7 +190,7 @@ class ConfigIssue:
     metadata: Dict = field(default_factory=dict)
 
 
-@dataclass
+@dataclass(slots=True)
 class AnalysisReport:
     """Complete analysis report with categorized issues"""
 
@@ -89,15 +200,101 @@ class AnalysisReport:
     issues: List[ConfigIssue] = field(default_factory=list)
     summary: Dict[str, int] = field(default_factory=dict)
     recommendations: List[str] = field(default_factory=list)
-    generated_at: datetime = field(default_factory=datetime.utcnow)
+    generated_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+def _write_json_report(report: AnalysisReport, out: BinaryIO) -> None:
+    """Write the report as indented JSON, serializing one issue at a time
+
+    The bytes match ``orjson.dumps(report, option=orjson.OPT_INDENT_2)``, but
+    the full document is never built in memory.
+    """
+    head, tail = orjson.dumps(
+        replace(report, issues=[]), option=orjson.OPT_INDENT_2
+    ).split(b'"issues": []', 1)
+    out.write(head)
+    out.write(b'"issues": [')
+    separator = b"\n    "
+    for issue in report.issues:
+        out.write(separator)
+        # Re-indent the issue object to its depth inside the array
+        out.write(
+            orjson.dumps(issue, option=orjson.OPT_INDENT_2).replace(b"\n", b"\n    ")
+        )
+        separator = b",\n    "
+    out.write(b"\n  ]" if report.issues else b"]")
+    out.write(tail)
+
+
+_SUGGESTION_COLUMNS = (
+    ("Entity ID", {"style": "cyan"}),
+    ("Suggested Name", {"style": "green"}),
+    ("Confidence", {"justify": "center"}),
+    ("Domain", {"style": "dim"}),
+    ("Area", {"style": "dim"}),
+)
+
+
+def _friendly_name_table(
+    suggestions: List[Dict[str, Any]], min_confidence: float
+) -> Table:
+    """Build the friendly name suggestions table
+
+    Rich measures every cell of every flexible column before rendering. When
+    the table fits the console anyway, each column is pinned to its natural
+    width (the widest cell), which skips that pass, and marked no_wrap, which
+    skips the line-breaking search; narrower consoles keep Rich's measuring
+    and wrapping.
+    """
+    rows = [
+        (
+            s["entity_id"],
+            s["suggested_name"],
+            f"{s['confidence']:.2f}",
+            s.get("domain", ""),
+            s.get("area", ""),
+        )
+        for s in suggestions
+    ]
+    headers = [name for name, _ in _SUGGESTION_COLUMNS]
+    widths = [max(map(cell_len, column)) for column in zip(headers, *rows)]
+    # One space of padding on each side plus a border between/around columns
+    fits = sum(widths) + 3 * len(widths) + 1 <= console.width
+
+    table = Table(title=f"Friendly Name Suggestions (confidence >= {min_confidence})")
+    for (name, options), width in zip(_SUGGESTION_COLUMNS, widths):
+        if fits:
+            table.add_column(name, width=width, no_wrap=True, **options)
+        else:
+            table.add_column(name, **options)
+    for row in rows:
+        table.add_row(*row)
+    return table
 
 
 class HAConfigAdvisor:
     """Main advisor class that analyzes HA configuration"""
 
-    def __init__(self):
-        """Initialize the advisor with database and API connections"""
+    def __init__(
+        self,
+        category_filter: Optional[Set[IssueCategory]] = None,
+        level_filter: Optional[Set[IssueLevel]] = None,
+    ):
+        """Initialize the advisor with database and API connections
+
+        With a category or level filter, issues outside it are not built at all
+        and the report (summary included) only covers the selected issues.
+        """
+        # Imported here rather than at module level so ``--help`` and argument
+        # errors do not pay for the HTTP, ArangoDB and settings stacks
+        import httpx
+        from arango import ArangoClient
+
+        from ha_rag_bridge.settings import HTTP_TIMEOUT
+
         self.console = Console()
+        self._category_filter = category_filter
+        self._level_filter = level_filter
 
         # Initialize ArangoDB connection
         self.arango = ArangoClient(hosts=os.environ["ARANGO_URL"])
@@ -112,6 +309,11 @@ class HAConfigAdvisor:
         self.ha_url = os.environ["HA_URL"]
         self.ha_token = os.environ["HA_TOKEN"]
         self.headers = {"Authorization": f"Bearer {self.ha_token}"}
+        # One pooled client for every HA call, so fetch and apply share the
+        # connection; released by close() or leaving the ``with`` block
+        self._client = httpx.Client(
+            base_url=self.ha_url, headers=self.headers, timeout=HTTP_TIMEOUT
+        )
 
         # Initialize friendly name generator
         self.friendly_name_generator = FriendlyNameGenerator()
@@ -121,6 +323,17 @@ class HAConfigAdvisor:
         self.devices: List[Dict] = []
         self.areas: List[Dict] = []
         self.area_map: Dict[str, str] = {}
+        self.device_area_map: Dict[str, str] = {}
+
+    def close(self) -> None:
+        """Close the HA HTTP client"""
+        self._client.close()
+
+    def __enter__(self) -> HAConfigAdvisor:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
 
     def fetch_ha_data(self) -> None:
         """Fetch current HA data from the RAG API"""
@@ -131,147 +344,166 @@ class HAConfigAdvisor:
         ) as progress:
             task = progress.add_task("Fetching Home Assistant data...", total=None)
 
-            with httpx.Client(
-                base_url=self.ha_url, headers=self.headers, timeout=HTTP_TIMEOUT
-            ) as client:
-                try:
-                    resp = client.get("/api/rag/static/entities")
-                    resp.raise_for_status()
-                    data = resp.json()
+            try:
+                resp = self._client.get("/api/rag/static/entities")
+                resp.raise_for_status()
+                data = resp.json()
 
-                    self.entities = data.get("entities", [])
-                    self.devices = data.get("devices", [])
-                    self.areas = data.get("areas", [])
+                self.entities = data.get("entities", [])
+                self.devices = data.get("devices", [])
+                self.areas = data.get("areas", [])
 
-                    # Build area mapping
-                    self.area_map = {}
-                    for area in self.areas:
-                        area_id = area.get("area_id") or area.get("id")
-                        if area_id and area.get("name"):
-                            self.area_map[area_id] = area["name"]
+                self._index_ha_data()
 
-                    progress.update(task, completed=True)
+                progress.update(task, completed=True)
 
-                except Exception as e:
-                    logger.error(f"Failed to fetch HA data: {e}")
-                    raise
+            except Exception as e:
+                logger.error(f"Failed to fetch HA data: {e}")
+                raise
 
-    def analyze_entities(self) -> List[ConfigIssue]:
-        """Analyze entities for configuration issues"""
-        issues = []
+    def _index_ha_data(self) -> None:
+        """Build the lookups shared by the analyses once per fetch"""
+        # Build area mapping
+        self.area_map = {}
+        for area in self.areas:
+            area_id = area.get("area_id") or area.get("id")
+            if area_id and area.get("name"):
+                self.area_map[area_id] = area["name"]
 
         # Build device area mapping
-        device_area_map = {}
+        self.device_area_map = {}
         for device in self.devices:
             device_id = device.get("id") or device.get("device_id", "")
             if device_id and device.get("area_id"):
-                device_area_map[device_id] = device["area_id"]
+                self.device_area_map[device_id] = device["area_id"]
 
+        # Split every entity_id once; the analyses read the cached parts
         for entity in self.entities:
-            entity_id = entity.get("entity_id", "")
+            for key, default in _ENTITY_DEFAULTS.items():
+                entity.setdefault(key, default)
+            entity_id = entity["entity_id"] or ""
+            domain, dot, _ = entity_id.partition(".")
+            entity["_domain"] = domain if dot else ""
+            entity["_object_id"] = entity_id.rpartition(".")[2]
+            # Lowercased text the device-class keywords are matched against
+            unit = entity.get("unit_of_measurement") or ""
+            friendly_name = entity.get("friendly_name") or ""
+            entity["_lc_text"] = f"{entity_id} {unit} {friendly_name}".lower()
+
+    def _wants(self, category: IssueCategory, level: IssueLevel) -> bool:
+        """Whether issues of this category and level pass the report filters"""
+        return (
+            self._category_filter is None or category in self._category_filter
+        ) and (self._level_filter is None or level in self._level_filter)
+
+    def analyze_entities(self) -> Iterator[ConfigIssue]:
+        """Analyze entities for configuration issues"""
+        device_area_map = self.device_area_map
+
+        want_orphaned = self._wants(IssueCategory.ENTITY_ORPHANED, IssueLevel.WARNING)
+        want_redundant = self._wants(IssueCategory.REDUNDANT_AREA, IssueLevel.WARNING)
+        want_friendly_name = self._wants(IssueCategory.FRIENDLY_NAME, IssueLevel.INFO)
+        want_device_class = self._wants(IssueCategory.DEVICE_CLASS, IssueLevel.INFO)
+
+        for entity in self.entities:
+            entity_id, entity_area_id, device_id, friendly_name, device_class = (
+                _ENTITY_FIELDS(entity)
+            )
             if not entity_id:
                 continue
 
-            entity_area_id = entity.get("area_id")
-            device_id = entity.get("device_id")
             device_area_id = device_area_map.get(device_id) if device_id else None
 
             # Check for truly orphaned entities (neither entity nor device has area)
-            if not entity_area_id and not device_area_id:
-                issues.append(
-                    ConfigIssue(
-                        entity_id=entity_id,
-                        category=IssueCategory.ENTITY_ORPHANED,
-                        level=IssueLevel.WARNING,
-                        title="Entity and its device have no area assignment",
-                        description=f"Entity {entity_id} and its device both lack area assignment",
-                        recommendation="Assign area to the device (preferred) or directly to the entity",
-                        auto_fixable=False,
-                        metadata={
-                            "friendly_name": entity.get("friendly_name", ""),
-                            "device_id": device_id,
-                        },
-                    )
+            if want_orphaned and not entity_area_id and not device_area_id:
+                yield ConfigIssue(
+                    entity_id=entity_id,
+                    category=IssueCategory.ENTITY_ORPHANED,
+                    level=IssueLevel.WARNING,
+                    title="Entity and its device have no area assignment",
+                    description=f"Entity {entity_id} and its device both lack area assignment",
+                    recommendation="Assign area to the device (preferred) or directly to the entity",
+                    auto_fixable=False,
+                    metadata={
+                        "friendly_name": friendly_name,
+                        "device_id": device_id,
+                    },
                 )
 
             # Check for redundant area assignment (entity area same as device area)
-            elif entity_area_id and device_area_id and entity_area_id == device_area_id:
-                issues.append(
-                    ConfigIssue(
-                        entity_id=entity_id,
-                        category=IssueCategory.REDUNDANT_AREA,
-                        level=IssueLevel.WARNING,
-                        title="Redundant entity area assignment",
-                        description=f"Entity {entity_id} has same area as its device - inheritance is sufficient",
-                        recommendation="Remove entity area assignment to let it inherit from device",
-                        auto_fixable=True,
-                        current_value=entity_area_id,
-                        suggested_value=None,
-                        metadata={
-                            "device_area": device_area_id,
-                            "device_id": device_id,
-                        },
-                    )
+            elif (
+                want_redundant
+                and entity_area_id
+                and device_area_id
+                and entity_area_id == device_area_id
+            ):
+                yield ConfigIssue(
+                    entity_id=entity_id,
+                    category=IssueCategory.REDUNDANT_AREA,
+                    level=IssueLevel.WARNING,
+                    title="Redundant entity area assignment",
+                    description=f"Entity {entity_id} has same area as its device - inheritance is sufficient",
+                    recommendation="Remove entity area assignment to let it inherit from device",
+                    auto_fixable=True,
+                    current_value=entity_area_id,
+                    suggested_value=None,
+                    metadata={
+                        "device_area": device_area_id,
+                        "device_id": device_id,
+                    },
                 )
 
             # Check friendly name quality
-            friendly_name = entity.get("friendly_name", "")
 
-            if not friendly_name:
-                issues.append(
-                    ConfigIssue(
-                        entity_id=entity_id,
-                        category=IssueCategory.FRIENDLY_NAME,
-                        level=IssueLevel.INFO,
-                        title="Missing friendly name",
-                        description=f"Entity {entity_id} has no friendly name set",
-                        recommendation="Set a descriptive friendly name for better user experience",
-                        auto_fixable=False,
-                    )
+            if want_friendly_name and not friendly_name:
+                yield ConfigIssue(
+                    entity_id=entity_id,
+                    category=IssueCategory.FRIENDLY_NAME,
+                    level=IssueLevel.INFO,
+                    title="Missing friendly name",
+                    description=f"Entity {entity_id} has no friendly name set",
+                    recommendation="Set a descriptive friendly name for better user experience",
+                    auto_fixable=False,
                 )
-            elif self._is_poor_friendly_name(friendly_name, entity_id):
-                suggestion = self._suggest_friendly_name(entity_id, friendly_name)
-                issues.append(
-                    ConfigIssue(
-                        entity_id=entity_id,
-                        category=IssueCategory.FRIENDLY_NAME,
-                        level=IssueLevel.INFO,
-                        title="Generic or unclear friendly name",
-                        description=f"Friendly name '{friendly_name}' could be more descriptive",
-                        recommendation=f"Consider renaming to something like '{suggestion}'",
-                        auto_fixable=False,
-                        current_value=friendly_name,
-                        suggested_value=suggestion,
-                    )
+            elif want_friendly_name and self._is_poor_friendly_name(
+                friendly_name, entity["_object_id"]
+            ):
+                suggestion = self._suggest_friendly_name(
+                    entity["_object_id"], friendly_name
+                )
+                yield ConfigIssue(
+                    entity_id=entity_id,
+                    category=IssueCategory.FRIENDLY_NAME,
+                    level=IssueLevel.INFO,
+                    title="Generic or unclear friendly name",
+                    description=f"Friendly name '{friendly_name}' could be more descriptive",
+                    recommendation=f"Consider renaming to something like '{suggestion}'",
+                    auto_fixable=False,
+                    current_value=friendly_name,
+                    suggested_value=suggestion,
                 )
 
             # Check device class assignment
-            domain = entity_id.split(".")[0] if "." in entity_id else ""
-            device_class = entity.get("device_class")
-
-            if domain == "sensor" and not device_class:
+            if want_device_class and entity["_domain"] == "sensor" and not device_class:
                 # Suggest device class based on entity name/unit
                 suggested_class = self._suggest_device_class(entity)
                 if suggested_class:
-                    issues.append(
-                        ConfigIssue(
-                            entity_id=entity_id,
-                            category=IssueCategory.DEVICE_CLASS,
-                            level=IssueLevel.INFO,
-                            title="Missing device class",
-                            description=f"Sensor {entity_id} would benefit from a device class",
-                            recommendation=f"Consider setting device_class to '{suggested_class}'",
-                            auto_fixable=False,
-                            suggested_value=suggested_class,
-                            metadata={"unit": entity.get("unit_of_measurement", "")},
-                        )
+                    yield ConfigIssue(
+                        entity_id=entity_id,
+                        category=IssueCategory.DEVICE_CLASS,
+                        level=IssueLevel.INFO,
+                        title="Missing device class",
+                        description=f"Sensor {entity_id} would benefit from a device class",
+                        recommendation=f"Consider setting device_class to '{suggested_class}'",
+                        auto_fixable=False,
+                        suggested_value=suggested_class,
+                        metadata={"unit": entity["unit_of_measurement"]},
                     )
 
-        return issues
-
-    def analyze_devices(self) -> List[ConfigIssue]:
+    def analyze_devices(self) -> Iterator[ConfigIssue]:
         """Analyze devices for configuration issues"""
-        issues = []
+        want_area = self._wants(IssueCategory.DEVICE_AREA, IssueLevel.WARNING)
+        want_naming = self._wants(IssueCategory.DEVICE_NAMING, IssueLevel.INFO)
 
         for device in self.devices:
             device_id = device.get("id") or device.get("device_id", "")
@@ -280,124 +512,108 @@ class HAConfigAdvisor:
 
             # Check for devices without area assignment
             area_id = device.get("area_id")
-            if not area_id:
-                issues.append(
-                    ConfigIssue(
-                        device_id=device_id,
-                        category=IssueCategory.DEVICE_AREA,
-                        level=IssueLevel.WARNING,
-                        title="Device has no area assignment",
-                        description=f"Device '{device.get('name', device_id)}' is not assigned to any area",
-                        recommendation="Assign this device to an appropriate area in Home Assistant",
-                        auto_fixable=False,
-                        metadata={"name": device.get("name", "")},
-                    )
+            if want_area and not area_id:
+                yield ConfigIssue(
+                    device_id=device_id,
+                    category=IssueCategory.DEVICE_AREA,
+                    level=IssueLevel.WARNING,
+                    title="Device has no area assignment",
+                    description=f"Device '{device.get('name', device_id)}' is not assigned to any area",
+                    recommendation="Assign this device to an appropriate area in Home Assistant",
+                    auto_fixable=False,
+                    metadata={"name": device.get("name", "")},
                 )
 
             # Check device naming
             device_name = device.get("name", "")
-            if not device_name:
-                issues.append(
-                    ConfigIssue(
-                        device_id=device_id,
-                        category=IssueCategory.DEVICE_NAMING,
-                        level=IssueLevel.INFO,
-                        title="Device has no name",
-                        description=f"Device {device_id} has no descriptive name",
-                        recommendation="Set a descriptive name for this device",
-                        auto_fixable=False,
-                    )
+            if want_naming and not device_name:
+                yield ConfigIssue(
+                    device_id=device_id,
+                    category=IssueCategory.DEVICE_NAMING,
+                    level=IssueLevel.INFO,
+                    title="Device has no name",
+                    description=f"Device {device_id} has no descriptive name",
+                    recommendation="Set a descriptive name for this device",
+                    auto_fixable=False,
                 )
-            elif self._is_poor_device_name(device_name):
+            elif want_naming and self._is_poor_device_name(device_name):
                 suggestion = self._suggest_device_name(device)
-                issues.append(
-                    ConfigIssue(
-                        device_id=device_id,
-                        category=IssueCategory.DEVICE_NAMING,
-                        level=IssueLevel.INFO,
-                        title="Generic device name",
-                        description=f"Device name '{device_name}' could be more descriptive",
-                        recommendation=f"Consider renaming to something like '{suggestion}'",
-                        auto_fixable=False,
-                        current_value=device_name,
-                        suggested_value=suggestion,
-                    )
+                yield ConfigIssue(
+                    device_id=device_id,
+                    category=IssueCategory.DEVICE_NAMING,
+                    level=IssueLevel.INFO,
+                    title="Generic device name",
+                    description=f"Device name '{device_name}' could be more descriptive",
+                    recommendation=f"Consider renaming to something like '{suggestion}'",
+                    auto_fixable=False,
+                    current_value=device_name,
+                    suggested_value=suggestion,
                 )
 
-        return issues
-
-    def analyze_area_consistency(self) -> List[ConfigIssue]:
+    def analyze_area_consistency(self) -> Iterator[ConfigIssue]:
         """Analyze area assignment consistency"""
-        issues = []
+        if not self._wants(IssueCategory.AREA_CONSISTENCY, IssueLevel.INFO):
+            return
 
-        # Find entities that could be grouped better
-        area_entity_map: Dict[str, List[Any]] = {}
+        # Group similar entities (same domain, device class and unit) and keep
+        # the areas each group spans, in first-seen order
+        groups: Dict[tuple, tuple[List[str], Dict[str, None]]] = {}
         for entity in self.entities:
-            area_id = entity.get("area_id")
+            key = (
+                entity["_domain"],
+                entity["device_class"],
+                entity["unit_of_measurement"],
+            )
+            entity_names, areas = groups.setdefault(key, ([], {}))
+            entity_names.append(entity["entity_id"])
+            area_id = entity["area_id"]
             if area_id:
-                if area_id not in area_entity_map:
-                    area_entity_map[area_id] = []
-                area_entity_map[area_id].append(entity)
-
-        # Look for similar entities in different areas
-        similar_entities = self._find_similar_entities_across_areas()
-        for group in similar_entities:
-            if len(group) > 1:
-                areas = [e.get("area_id") for e in group if e.get("area_id")]
-                if len(set(areas)) > 1:
-                    entity_names = [e.get("entity_id", "") for e in group]
-                    issues.append(
-                        ConfigIssue(
-                            category=IssueCategory.AREA_CONSISTENCY,
-                            level=IssueLevel.INFO,
-                            title="Similar entities in different areas",
-                            description=f"Similar entities found across areas: {', '.join(entity_names)}",
-                            recommendation="Review if these entities should be grouped in the same area",
-                            auto_fixable=False,
-                            metadata={
-                                "entities": entity_names,
-                                "areas": list(set(areas)),
-                            },
-                        )
-                    )
-
-        return issues
+                areas[area_id] = None
+
+        # Only groups spread over more than one area are worth reporting
+        for entity_names, areas in groups.values():
+            if len(areas) > 1:
+                yield ConfigIssue(
+                    category=IssueCategory.AREA_CONSISTENCY,
+                    level=IssueLevel.INFO,
+                    title="Similar entities in different areas",
+                    description=f"Similar entities found across areas: {', '.join(entity_names)}",
+                    recommendation="Review if these entities should be grouped in the same area",
+                    auto_fixable=False,
+                    metadata={
+                        "entities": entity_names,
+                        "areas": list(areas),
+                    },
+                )
 
     def generate_report(self) -> AnalysisReport:
         """Generate complete analysis report"""
         all_issues = []
 
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            console=self.console,
-        ) as progress:
-
-            task1 = progress.add_task("Analyzing entities...", total=None)
-            entity_issues = self.analyze_entities()
-            all_issues.extend(entity_issues)
-            progress.update(task1, completed=True)
-
-            task2 = progress.add_task("Analyzing devices...", total=None)
-            device_issues = self.analyze_devices()
-            all_issues.extend(device_issues)
-            progress.update(task2, completed=True)
-
-            task3 = progress.add_task("Analyzing area consistency...", total=None)
-            area_issues = self.analyze_area_consistency()
-            all_issues.extend(area_issues)
-            progress.update(task3, completed=True)
+        # The analyses are in-memory passes that finish in milliseconds, so
+        # they get a debug line each rather than a progress spinner
+        for phase, analyze in (
+            ("entities", self.analyze_entities),
+            ("devices", self.analyze_devices),
+            ("area_consistency", self.analyze_area_consistency),
+        ):
+            found_before = len(all_issues)
+            all_issues.extend(analyze())
+            logger.debug(
+                "Advisor analysis done",
+                phase=phase,
+                issues=len(all_issues) - found_before,
+            )
 
         # Generate summary statistics
-        summary: Dict[str, Any] = {}
-        for issue in all_issues:
-            level_key = f"{issue.level.value}_count"
-            category_key = f"{issue.category.value}_count"
-            summary[level_key] = summary.get(level_key, 0) + 1
-            summary[category_key] = summary.get(category_key, 0) + 1
+        summary: Dict[str, int] = Counter(
+            key
+            for issue in all_issues
+            for key in (f"{issue.level.value}_count", f"{issue.category.value}_count")
+        )
 
         # Generate high-level recommendations
-        recommendations = self._generate_recommendations(all_issues)
+        recommendations = self._generate_recommendations(summary)
 
         return AnalysisReport(
             total_entities=len(self.entities),
@@ -408,92 +624,24 @@ class HAConfigAdvisor:
             recommendations=recommendations,
         )
 
-    def _is_poor_friendly_name(self, friendly_name: str, entity_id: str) -> bool:
+    def _is_poor_friendly_name(self, friendly_name: str, object_id: str) -> bool:
         """Check if friendly name is generic or unclear"""
-        # Generic patterns that indicate poor naming
-        generic_patterns = [
-            r"^[A-Z0-9_-]+$",  # ALL_CAPS_WITH_UNDERSCORES
-            r"^(sensor|switch|light|climate)\d*$",  # Just domain + number
-            r"^device\d*$",  # Generic "device" names
-            r"^unnamed",  # Unnamed devices
-        ]
-
-        for pattern in generic_patterns:
-            if re.match(pattern, friendly_name, re.IGNORECASE):
-                return True
+        return _is_poor_friendly_name(friendly_name, object_id)
 
-        # Check if friendly name is too similar to entity_id
-        name_clean = friendly_name.lower().replace(" ", "_").replace("-", "_")
-        entity_name = entity_id.split(".")[-1] if "." in entity_id else entity_id
-
-        return name_clean == entity_name.lower()
-
-    def _suggest_friendly_name(self, entity_id: str, current_name: str) -> str:
+    def _suggest_friendly_name(self, object_id: str, current_name: str) -> str:
         """Suggest a better friendly name"""
-        entity_name = entity_id.split(".")[-1] if "." in entity_id else entity_id
-
-        # Basic suggestions based on domain and entity structure
-        suggestions = {
-            "temperature": "Temperature Sensor",
-            "humidity": "Humidity Sensor",
-            "power": "Power Monitor",
-            "energy": "Energy Meter",
-            "light": "Light",
-            "switch": "Switch",
-        }
-
-        for keyword, suggestion in suggestions.items():
-            if keyword in entity_name.lower():
-                return suggestion
-
-        # Fallback: capitalize and clean up entity name
-        clean_name = entity_name.replace("_", " ").title()
-        return clean_name
+        return _suggest_friendly_name(object_id)
 
     def _suggest_device_class(self, entity: dict) -> Optional[str]:
         """Suggest appropriate device class for sensor"""
-        entity_id = entity.get("entity_id", "") or ""
-        unit = entity.get("unit_of_measurement", "") or ""
-        friendly_name = entity.get("friendly_name", "") or ""
-
-        entity_id = entity_id.lower()
-        unit = unit.lower()
-        friendly_name = friendly_name.lower()
-
-        # Map common patterns to device classes
-        class_mapping = {
-            "temperature": ["°c", "celsius", "temp", "hőmérséklet"],
-            "humidity": ["%", "humidity", "páratartalom", "nedvesség"],
-            "power": ["w", "watt", "power", "fogyasztás"],
-            "energy": ["kwh", "energy", "energia"],
-            "illuminance": ["lx", "lux", "light", "fény"],
-            "pressure": ["hpa", "mbar", "pressure", "nyomás"],
-            "battery": ["battery", "akkumulátor"],
-        }
-
-        text_to_check = f"{entity_id} {unit} {friendly_name}"
+        text_to_check = entity["_lc_text"]
 
-        for device_class, keywords in class_mapping.items():
-            if any(keyword in text_to_check for keyword in keywords):
-                return device_class
-
-        return None
+        found = {m.lastgroup for m in _DEVICE_CLASS_RE.finditer(text_to_check)}
+        return next((dc for dc in _DEVICE_CLASS_KEYWORDS if dc in found), None)
 
     def _is_poor_device_name(self, device_name: str) -> bool:
         """Check if device name is generic"""
-        generic_patterns = [
-            r"^[A-F0-9]{12}$",  # MAC addresses
-            r"^device\d*$",  # Generic "device" names
-            r"^[A-Z0-9_-]+$",  # ALL_CAPS_WITH_UNDERSCORES
-            r"^unnamed",  # Unnamed devices
-            r"^\d+\.\d+\.\d+\.\d+$",  # IP addresses
-        ]
-
-        for pattern in generic_patterns:
-            if re.match(pattern, device_name, re.IGNORECASE):
-                return True
-
-        return False
+        return _GENERIC_DEVICE_NAME_RE.match(device_name) is not None
 
     def _suggest_device_name(self, device: dict) -> str:
         """Suggest better device name"""
@@ -514,45 +662,14 @@ class HAConfigAdvisor:
 
         return " ".join(suggestions) if suggestions else "Smart Device"
 
-    def _find_similar_entities_across_areas(self) -> List[List[dict]]:
-        """Find groups of similar entities that might belong together"""
-        # Group entities by domain and device class
-        groups: Dict[str, List[Any]] = {}
-
-        for entity in self.entities:
-            domain = (
-                entity.get("entity_id", "").split(".")[0]
-                if entity.get("entity_id")
-                else ""
-            )
-            device_class = entity.get("device_class", "")
-            unit = entity.get("unit_of_measurement", "")
-
-            key = f"{domain}_{device_class}_{unit}"
-            if key not in groups:
-                groups[key] = []
-            groups[key].append(entity)
-
-        # Return groups with multiple entities
-        return [group for group in groups.values() if len(group) > 1]
-
-    def _generate_recommendations(self, issues: List[ConfigIssue]) -> List[str]:
-        """Generate high-level recommendations based on issues found"""
+    def _generate_recommendations(self, summary: Dict[str, int]) -> List[str]:
+        """Generate high-level recommendations from the report's issue counts"""
         recommendations = []
 
-        orphaned_entities = len(
-            [i for i in issues if i.category == IssueCategory.ENTITY_ORPHANED]
-        )
-        orphaned_devices = len(
-            [i for i in issues if i.category == IssueCategory.DEVICE_AREA]
-        )
-        naming_issues = len(
-            [
-                i
-                for i in issues
-                if i.category
-                in [IssueCategory.FRIENDLY_NAME, IssueCategory.DEVICE_NAMING]
-            ]
+        orphaned_entities = summary.get("entity_orphaned_count", 0)
+        orphaned_devices = summary.get("device_area_count", 0)
+        naming_issues = summary.get("friendly_name_count", 0) + summary.get(
+            "device_naming_count", 0
         )
 
         if orphaned_entities > 0:
@@ -605,14 +722,10 @@ class HAConfigAdvisor:
         for level in IssueLevel:
             count = report.summary.get(f"{level.value}_count", 0)
             if count > 0:
-                color = {
-                    "critical": "red",
-                    "error": "red",
-                    "warning": "yellow",
-                    "info": "blue",
-                }.get(level.value, "white")
                 summary_table.add_row(
-                    f"{level.value.title()} Issues", str(count), style=color
+                    f"{level.value.title()} Issues",
+                    str(count),
+                    style=_LEVEL_COLORS[level],
                 )
 
         console.print(summary_table)
@@ -629,40 +742,35 @@ class HAConfigAdvisor:
         if show_details and report.issues:
             console.print("[bold yellow]🔍 Detailed Issues[/bold yellow]")
 
-            # Group issues by category
+            # Group issues by category, in order of first appearance
             issues_by_category: Dict[str, List[Any]] = {}
             for issue in report.issues:
-                category = issue.category.value
-                if category not in issues_by_category:
-                    issues_by_category[category] = []
-                issues_by_category[category].append(issue)
+                issues_by_category.setdefault(issue.category.value, []).append(issue)
 
+            # Each category is rendered with a single print of its joined lines
             for category, issues in issues_by_category.items():
-                console.print(
+                lines = [
                     f"\n[bold]{category.replace('_', ' ').title()}[/bold] ({len(issues)} issues)"
-                )
+                ]
 
                 for issue in issues[:5]:  # Show first 5 issues per category
-                    level_color = {
-                        "critical": "red",
-                        "error": "red",
-                        "warning": "yellow",
-                        "info": "blue",
-                    }[issue.level.value]
-                    console.print(f"  [{level_color}]●[/{level_color}] {issue.title}")
+                    level_color = _LEVEL_COLORS[issue.level]
+                    lines.append(f"  [{level_color}]●[/{level_color}] {issue.title}")
                     if issue.entity_id:
-                        console.print(f"    Entity: {issue.entity_id}")
+                        lines.append(f"    Entity: {issue.entity_id}")
                     if issue.device_id:
-                        console.print(f"    Device: {issue.device_id}")
-                    console.print(f"    {issue.description}")
-                    console.print(f"    💡 {issue.recommendation}")
-                    console.print()
+                        lines.append(f"    Device: {issue.device_id}")
+                    lines.append(f"    {issue.description}")
+                    lines.append(f"    💡 {issue.recommendation}")
+                    lines.append("")
 
                 if len(issues) > 5:
-                    console.print(
+                    lines.append(
                         f"  ... and {len(issues) - 5} more issues in this category"
                     )
 
+                console.print("\n".join(lines))
+
         console.print(
             f"[dim]Report generated at: {report.generated_at.strftime('%Y-%m-%d %H:%M:%S')}[/dim]"
         )
@@ -709,21 +817,18 @@ class HAConfigAdvisor:
         ]
 
         try:
-            with httpx.Client(
-                base_url=self.ha_url, headers=self.headers, timeout=HTTP_TIMEOUT
-            ) as client:
-                response = client.post(
-                    "/api/rag/batch_update_friendly_names", json={"updates": updates}
-                )
-                response.raise_for_status()
-                result = response.json()
+            response = self._client.post(
+                "/api/rag/batch_update_friendly_names", json={"updates": updates}
+            )
+            response.raise_for_status()
+            result = response.json()
 
-                return {
-                    "success": result.get("success", False),
-                    "updated": result.get("updated", 0),
-                    "results": result.get("results", []),
-                    "errors": result.get("errors", []),
-                }
+            return {
+                "success": result.get("success", False),
+                "updated": result.get("updated", 0),
+                "results": result.get("results", []),
+                "errors": result.get("errors", []),
+            }
 
         except Exception as e:
             return {"success": False, "error": str(e)}
@@ -739,6 +844,11 @@ def main():
         help="Output format (default: console)",
     )
     parser.add_argument("--output", help="Output file path (default: stdout)")
+    parser.add_argument(
+        "--append",
+        action="store_true",
+        help="Append the JSON report as one line (NDJSON) to --output instead of overwriting it",
+    )
     parser.add_argument(
         "--detailed", action="store_true", help="Show detailed issue breakdown"
     )
@@ -775,139 +885,100 @@ def main():
     )
 
     args = parser.parse_args()
+    if args.append and not (args.format == "json" and args.output):
+        parser.error("--append requires --format json and --output")
 
     try:
-        advisor = HAConfigAdvisor()
-        advisor.fetch_ha_data()
-
-        # Handle friendly name operations
-        if args.suggest_friendly_names or args.apply_friendly_names:
-            suggestions = advisor.generate_friendly_name_suggestions(
-                min_confidence=args.confidence
-            )
-
-            if args.suggest_friendly_names:
-                console.print("[bold green]🧠 Friendly Name Suggestions[/bold green]")
-
-                if not suggestions:
-                    console.print(
-                        "No suggestions found with the specified confidence threshold."
-                    )
-                    return 0
-
-                table = Table(
-                    title=f"Friendly Name Suggestions (confidence >= {args.confidence})"
+        with HAConfigAdvisor(
+            category_filter={IssueCategory(args.category)} if args.category else None,
+            level_filter={IssueLevel(args.level)} if args.level else None,
+        ) as advisor:
+            advisor.fetch_ha_data()
+
+            # Handle friendly name operations
+            if args.suggest_friendly_names or args.apply_friendly_names:
+                suggestions = advisor.generate_friendly_name_suggestions(
+                    min_confidence=args.confidence
                 )
-                table.add_column("Entity ID", style="cyan")
-                table.add_column("Suggested Name", style="green")
-                table.add_column("Confidence", justify="center")
-                table.add_column("Domain", style="dim")
-                table.add_column("Area", style="dim")
-
-                for s in suggestions:
-                    table.add_row(
-                        s["entity_id"],
-                        s["suggested_name"],
-                        f"{s['confidence']:.2f}",
-                        s.get("domain", ""),
-                        s.get("area", ""),
-                    )
-
-                console.print(table)
-                console.print(f"\nFound {len(suggestions)} suggestions.")
 
-                if not args.apply_friendly_names:
+                if args.suggest_friendly_names:
                     console.print(
-                        "\nUse --apply-friendly-names to apply these suggestions."
+                        "[bold green]🧠 Friendly Name Suggestions[/bold green]"
                     )
-                    return 0
-
-            if args.apply_friendly_names:
-                console.print(
-                    "[bold yellow]🔄 Applying Friendly Name Suggestions[/bold yellow]"
-                )
 
-                result = advisor.apply_friendly_name_suggestions(
-                    suggestions, dry_run=args.dry_run
-                )
+                    if not suggestions:
+                        console.print(
+                            "No suggestions found with the specified confidence threshold."
+                        )
+                        return 0
 
-                if result.get("dry_run"):
-                    console.print(
-                        f"[blue]DRY RUN: Would update {result['would_update']} entities[/blue]"
-                    )
-                    return 0
+                    console.print(_friendly_name_table(suggestions, args.confidence))
+                    console.print(f"\nFound {len(suggestions)} suggestions.")
 
-                if result.get("success"):
-                    console.print(
-                        f"[green]✅ Successfully updated {result['updated']} entities![/green]"
-                    )
-                    if result.get("errors"):
+                    if not args.apply_friendly_names:
                         console.print(
-                            f"[yellow]⚠️ {len(result['errors'])} errors occurred:[/yellow]"
+                            "\nUse --apply-friendly-names to apply these suggestions."
                         )
-                        for error in result["errors"]:
-                            console.print(f"  • {error}")
-                else:
+                        return 0
+
+                if args.apply_friendly_names:
                     console.print(
-                        f"[red]❌ Update failed: {result.get('error', 'Unknown error')}[/red]"
+                        "[bold yellow]🔄 Applying Friendly Name Suggestions[/bold yellow]"
                     )
-                    return 1
 
-                return 0
+                    result = advisor.apply_friendly_name_suggestions(
+                        suggestions, dry_run=args.dry_run
+                    )
 
-        # Regular advisor report
-        report = advisor.generate_report()
+                    if result.get("dry_run"):
+                        console.print(
+                            f"[blue]DRY RUN: Would update {result['would_update']} entities[/blue]"
+                        )
+                        return 0
 
-        # Filter issues if requested
-        if args.category or args.level:
-            filtered_issues = []
-            for issue in report.issues:
-                if args.category and issue.category.value != args.category:
-                    continue
-                if args.level and issue.level.value != args.level:
-                    continue
-                filtered_issues.append(issue)
-            report.issues = filtered_issues
-
-        # Output report
-        if args.format == "json":
-            # Convert to JSON-serializable format
-            report_dict = {
-                "total_entities": report.total_entities,
-                "total_devices": report.total_devices,
-                "total_areas": report.total_areas,
-                "issues": [
-                    {
-                        "entity_id": issue.entity_id,
-                        "device_id": issue.device_id,
-                        "area_id": issue.area_id,
-                        "category": issue.category.value,
-                        "level": issue.level.value,
-                        "title": issue.title,
-                        "description": issue.description,
-                        "recommendation": issue.recommendation,
-                        "auto_fixable": issue.auto_fixable,
-                        "current_value": issue.current_value,
-                        "suggested_value": issue.suggested_value,
-                        "metadata": issue.metadata,
-                    }
-                    for issue in report.issues
-                ],
-                "summary": report.summary,
-                "recommendations": report.recommendations,
-                "generated_at": report.generated_at.isoformat(),
-            }
+                    if result.get("success"):
+                        console.print(
+                            f"[green]✅ Successfully updated {result['updated']} entities![/green]"
+                        )
+                        if result.get("errors"):
+                            console.print(
+                                f"[yellow]⚠️ {len(result['errors'])} errors occurred:[/yellow]"
+                            )
+                            for error in result["errors"]:
+                                console.print(f"  • {error}")
+                    else:
+                        console.print(
+                            f"[red]❌ Update failed: {result.get('error', 'Unknown error')}[/red]"
+                        )
+                        return 1
 
-            output_text = json.dumps(report_dict, indent=2, ensure_ascii=False)
+                    return 0
 
-            if args.output:
-                with open(args.output, "w", encoding="utf-8") as f:
-                    f.write(output_text)
+            # Regular advisor report, already limited to --category/--level
+            report = advisor.generate_report()
+
+            # Output report
+            if args.format == "json":
+                # orjson serializes the report dataclasses directly (enums as
+                # their values, datetimes as RFC 3339), in field order
+                if args.append:
+                    # One compact report per line, so periodic runs accumulate
+                    # in a single file without rewriting the earlier ones
+                    with open(args.output, "ab") as f:
+                        f.write(orjson.dumps(report, option=orjson.OPT_APPEND_NEWLINE))
+                elif args.output:
+                    with open(args.output, "wb") as f:
+                        _write_json_report(report, f)
+                else:
+                    # orjson already produced UTF-8; write the bytes as-is
+                    # instead of decoding and letting print() re-encode them
+                    sys.stdout.flush()
+                    _write_json_report(report, sys.stdout.buffer)
+                    sys.stdout.buffer.write(b"\n")
+                    sys.stdout.buffer.flush()
             else:
-                print(output_text)
-        else:
-            # Console output
-            advisor.display_report(report, show_details=args.detailed)
+                # Console output
+                advisor.display_report(report, show_details=args.detailed)
 
     except Exception as e:
         logger.error(f"Analysis failed: {e}")
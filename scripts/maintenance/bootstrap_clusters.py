@@ -9,13 +9,15 @@ project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 from ha_rag_bridge.logging import get_logger  # noqa: E402
-from app.services.rag.cluster_manager import ClusterManager  # noqa: E402
 
 logger = get_logger(__name__)
 
 
 def main():
     """Bootstrap initial semantic clusters."""
+    # Deferred so importing this script does not load the embedding/ArangoDB stack
+    from app.services.rag.cluster_manager import ClusterManager
+
     try:
         logger.info("Starting cluster bootstrap process...")
 
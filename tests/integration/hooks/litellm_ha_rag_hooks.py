@@ -19,11 +19,14 @@ litellm_settings:
 
 from __future__ import annotations
 
+import asyncio
 import logging
 import os
 from typing import Any, Dict, Literal, List
 
 import httpx
+import orjson
+from cachetools import TTLCache
 from litellm.integrations.custom_logger import CustomLogger
 from litellm.types.utils import LLMResponseTypes
 
@@ -47,15 +50,53 @@ TOOL_EXECUTION_ENDPOINT: str = f"{HA_RAG_API_URL}/execute_tool"
 # Tool‑execution behaviour: "ha-rag-bridge"|"caller"|"both"|"disabled"
 TOOL_EXECUTION_MODE: str = os.getenv("HA_RAG_TOOL_EXECUTION_MODE", "ha-rag-bridge")
 
+# Tool-call name prefixes ("<domain>.<service>") executed through the bridge
+_HA_TOOL_DOMAINS = frozenset(
+    {
+        "homeassistant",
+        "light",
+        "switch",
+        "climate",
+        "sensor",
+        "media_player",
+        "scene",
+        "script",
+        "automation",
+        "cover",
+        "fan",
+        "input_boolean",
+        "notify",
+    }
+)
+
+# OpenWebUI title/tag generation tasks don't need HA context unless explicitly enabled
+ENRICH_METADATA_TASKS: bool = bool(os.getenv("HA_RAG_ENRICH_METADATA_TASKS"))
+
+# Short-lived cache for identical bridge queries (OpenWebUI regenerate/retry)
+RAG_CACHE_MAXSIZE: int = int(os.getenv("HA_RAG_CACHE_MAXSIZE", "512"))
+RAG_CACHE_TTL: int = int(os.getenv("HA_RAG_CACHE_TTL", "30"))
+
+# Immutable pieces of the legacy CSV fallback context
+_CSV_HEADER: str = (
+    "Available Devices (relevant to your query):\n"
+    "```csv\nentity_id,name,state,aliases\n"
+)
+_CSV_FOOTER: str = "\n```"
+_NO_ENTITIES_CONTEXT: str = "No relevant entities found for your query."
+
+# Upper bound on the bridge response body to keep per-request memory bounded
+RAG_RESPONSE_MAX_BYTES: int = int(
+    os.getenv("HA_RAG_RESPONSE_MAX_BYTES", str(4 * 1024 * 1024))
+)
+
 # ──────────────────────────────────────────────────────────────────────────────
 # Logging
 # ──────────────────────────────────────────────────────────────────────────────
 
-logging.basicConfig(
-    level=logging.DEBUG,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-)
+# Handlers are owned by the host (LiteLLM proxy); only our own logger's level
+# is set here so importing the hook doesn't force DEBUG on the whole process.
 logger = logging.getLogger("litellm_ha_rag_hook")
+logger.setLevel(os.getenv("HA_RAG_HOOK_LOG_LEVEL", "INFO").upper())
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Helper functions
@@ -74,10 +115,27 @@ def _find_system_placeholder(messages: List[Dict[str, Any]]) -> int | None:
     return None
 
 
+def _message_text(content: Any) -> str:
+    """Return message content as text, joining the text parts of multimodal lists."""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(
+            part.get("text", "")
+            for part in content
+            if isinstance(part, dict) and part.get("type") == "text"
+        )
+    return str(content)
+
+
 def _extract_user_question_and_context(
     messages: List[Dict[str, Any]],
-) -> tuple[str | None, List[Dict[str, Any]]]:
-    """Extract the LAST user question and full conversation context."""
+) -> tuple[str | None, List[Dict[str, Any]], bool]:
+    """Extract the LAST user question and full conversation context.
+
+    The third element of the returned tuple is True when the last message is an
+    OpenWebUI metadata task (title/tag generation) rather than a real user turn.
+    """
     import re
 
     logger.debug(f"Extracting user question and context from {len(messages)} messages")
@@ -126,10 +184,10 @@ def _extract_user_question_and_context(
                     )
                     # Build conversation context from chat history
                     conversation_context = _parse_chat_history(chat_content)
-                    return question, conversation_context
+                    return question, conversation_context, True
 
             logger.debug("No valid chat history in metadata task")
-            return None, []
+            return None, [], True
 
     # For regular conversations, find the LAST user message
     last_user_question = None
@@ -138,20 +196,19 @@ def _extract_user_question_and_context(
     # Build full conversation context and find last user message
     for msg in messages:
         if msg.get("role") in ["user", "assistant", "system"]:
-            conversation_context.append(
-                {"role": msg.get("role"), "content": str(msg.get("content", ""))}
-            )
+            content = _message_text(msg.get("content", ""))
+            conversation_context.append({"role": msg.get("role"), "content": content})
 
             # Track the last user message
             if msg.get("role") == "user":
-                last_user_question = str(msg.get("content", "")).strip()
+                last_user_question = content.strip()
 
     if last_user_question:
         logger.info(f"Using LAST user question: '{last_user_question[:100]}...'")
-        return last_user_question, conversation_context
+        return last_user_question, conversation_context, False
 
     logger.debug("No user question found in conversation")
-    return None, []
+    return None, [], False
 
 
 def _parse_chat_history(chat_content: str) -> List[Dict[str, Any]]:
@@ -259,6 +316,22 @@ def _extract_conversation_insights(
     return " | ".join(insights) if insights else None
 
 
+async def _read_capped_body(resp: httpx.Response, max_bytes: int) -> bytes:
+    """Read a streamed response body, refusing anything larger than ``max_bytes``."""
+    declared = int(resp.headers.get("content-length") or 0)
+    if declared > max_bytes:
+        raise ValueError(f"Response too large: {declared} bytes (limit {max_bytes})")
+
+    chunks: List[bytes] = []
+    total = 0
+    async for chunk in resp.aiter_bytes():
+        total += len(chunk)
+        if total > max_bytes:
+            raise ValueError(f"Response exceeded {max_bytes} bytes while streaming")
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
 def _extract_stable_session_id(data: dict, messages: List[Dict[str, Any]]) -> str:
     """Extract stable session ID from OpenWebUI standard headers or generate fallback."""
     from datetime import datetime
@@ -316,6 +389,13 @@ class HARagHook(CustomLogger):
 
     def __init__(self):
         super().__init__()
+        # Parsed bridge responses keyed by (session_id, question, history length).
+        # Only requests with a stable session ID (OpenWebUI headers or an explicit
+        # session field) are cached; generated IDs are unique per call and would
+        # never hit. Concurrent misses for the same key each query the bridge.
+        self._rag_cache: TTLCache = TTLCache(
+            maxsize=RAG_CACHE_MAXSIZE, ttl=RAG_CACHE_TTL
+        )
         logger.info("HARagHook initialized successfully")
 
     # ────────────────────────────────
@@ -372,13 +452,17 @@ class HARagHook(CustomLogger):
             )
 
         # Cache-friendly approach: extract LAST user question and conversation context
-        user_question, conversation_context = _extract_user_question_and_context(
-            messages
+        user_question, conversation_context, is_metadata_task = (
+            _extract_user_question_and_context(messages)
         )
         if not user_question:
             logger.info("RAG Hook: No user question extracted - EXITING")
             return data
 
+        if is_metadata_task and not ENRICH_METADATA_TASKS:
+            logger.info("RAG Hook: OpenWebUI metadata task - skipping bridge call")
+            return data
+
         # Find the last user message to inject context into
         user_idx = None
         for idx in reversed(range(len(messages))):
@@ -395,115 +479,69 @@ class HARagHook(CustomLogger):
         )
         logger.info(f"RAG Hook: Conversation has {len(conversation_context)} messages")
 
-        logger.debug("Querying HA‑RAG bridge for relevant entities…")
-        logger.debug("Using RAG_QUERY_ENDPOINT: %s", RAG_QUERY_ENDPOINT)
-        formatted_content: str
-        try:
-            # Build conversation-aware payload for bridge
-            bridge_payload = {
-                "user_message": user_question,
-                "conversation_history": (
-                    conversation_context if conversation_context else None
-                ),
-            }
-
-            # Generate stable session ID for conversation continuity
-            stable_session_id = _extract_stable_session_id(data, messages)
-            bridge_payload["session_id"] = stable_session_id
-
-            # Keep conversation_id for backward compatibility (but now it's stable)
-            bridge_payload["conversation_id"] = stable_session_id
-
-            logger.debug(f"Using stable session/conversation ID: {stable_session_id}")
-
-            async with httpx.AsyncClient(timeout=10) as client:
-                logger.debug(
-                    "Sending request to RAG_QUERY_ENDPOINT with payload: %s",
-                    {
-                        **bridge_payload,
-                        "conversation_history": (
-                            f"[{len(conversation_context)} messages]"
-                            if conversation_context
-                            else None
-                        ),
-                    },
-                )
-                resp = await client.post(
-                    RAG_QUERY_ENDPOINT,
-                    json=bridge_payload,
-                )
-                resp.raise_for_status()
-                logger.debug(
-                    "Received response from RAG_QUERY_ENDPOINT: %s, %s",
-                    resp.status_code,
-                    resp.text,
-                )
-                rag_payload = resp.json()
+        # Build conversation-aware payload for bridge
+        bridge_payload: Dict[str, Any] = {
+            "user_message": user_question,
+            "conversation_history": (
+                conversation_context if conversation_context else None
+            ),
+        }
 
-            # Handle new bridge response format with messages array
-            messages_from_bridge = rag_payload.get("messages", [])
-            user_context = None
+        # Generate stable session ID for conversation continuity
+        stable_session_id = _extract_stable_session_id(data, messages)
+        bridge_payload["session_id"] = stable_session_id
 
-            # Look for user message with home context from Bridge
-            for msg in messages_from_bridge:
-                if msg.get("role") == "user" and "Current home context:" in msg.get(
-                    "content", ""
-                ):
-                    user_context = msg.get("content", "")
-                    break
+        # Keep conversation_id for backward compatibility (but now it's stable)
+        bridge_payload["conversation_id"] = stable_session_id
 
-            if user_context:
-                formatted_content = user_context
-            else:
-                # Fallback: try old format for backward compatibility
-                formatted_content = rag_payload.get("formatted_content")
-                if not formatted_content:
-                    entities = rag_payload.get("relevant_entities", [])
-                    if entities:
-                        rows = [
-                            f"{e['entity_id']},{e.get('name', e['entity_id'])},{e.get('state', 'unknown')},{'/'.join(e.get('aliases', []))}"
-                            for e in entities
-                        ]
-                        formatted_content = (
-                            "Available Devices (relevant to your query):\n"  # header
-                            "```csv\nentity_id,name,state,aliases\n"
-                            + "\n".join(rows)
-                            + "\n```"
-                        )
-                    else:
-                        formatted_content = "No relevant entities found for your query."
-        except Exception as exc:  # noqa: BLE001
-            logger.exception("HA‑RAG query failed: %s", exc)
-            formatted_content = "Error retrieving Home Assistant entities."
+        logger.debug(f"Using stable session/conversation ID: {stable_session_id}")
+
+        # Fire the bridge request first and let it reach its first network await,
+        # so the context preparation below overlaps with the round trip.
+        rag_task = asyncio.create_task(
+            self._query_bridge(bridge_payload, conversation_context)
+        )
+        await asyncio.sleep(0)
 
         # Cache-friendly approach: inject conversation-aware context into user message
         original_user_content = messages[user_idx]["content"]
 
-        # Build enhanced context with conversation awareness
-        context_parts = []
+        # Extract previously mentioned entities or areas (independent of the bridge)
+        prev_context = None
+        if len(conversation_context) > 1:  # More than just current message
+            prev_context = _extract_conversation_insights(conversation_context)
+
+        formatted_content = await rag_task
+
+        # Build enhanced context with conversation awareness. Headings and
+        # bodies are kept as separate pieces so the (potentially large) bridge
+        # context is copied only once, by the final join.
+        context_parts: List[str] = []
 
         # Add current relevant entities (always with fresh values)
         if (
             formatted_content
             and formatted_content != "Error retrieving Home Assistant entities."
         ):
-            context_parts.append(f"Aktuálisan releváns eszközök:\n{formatted_content}")
+            context_parts += ("Aktuálisan releváns eszközök:\n", formatted_content)
 
         # Add conversation context if available
-        if len(conversation_context) > 1:  # More than just current message
-            # Extract previously mentioned entities or areas
-            prev_context = _extract_conversation_insights(conversation_context)
-            if prev_context:
-                context_parts.append(
-                    f"A beszélgetés során korábban relevánsnak talált információk:\n{prev_context}"
-                )
+        if prev_context:
+            if context_parts:
+                context_parts.append("\n\n")
+            context_parts += (
+                "A beszélgetés során korábban relevánsnak talált információk:\n",
+                prev_context,
+            )
 
-        # Combine all context parts
         if context_parts:
-            combined_context = "\n\n".join(context_parts)
-            updated_user_content = (
-                f"{combined_context}\n\nFelhasználói kérdés: {original_user_content}"
+            # Multimodal content arrives as a list of parts; only its text can
+            # follow the context string
+            context_parts += (
+                "\n\nFelhasználói kérdés: ",
+                _message_text(original_user_content),
             )
+            updated_user_content = "".join(context_parts)
         else:
             updated_user_content = original_user_content
 
@@ -522,6 +560,90 @@ class HARagHook(CustomLogger):
 
         return data
 
+    async def _query_bridge(
+        self,
+        bridge_payload: Dict[str, Any],
+        conversation_context: List[Dict[str, Any]],
+    ) -> str:
+        """Query the HA‑RAG bridge and return the formatted entity context."""
+        logger.debug("Querying HA‑RAG bridge for relevant entities…")
+        logger.debug("Using RAG_QUERY_ENDPOINT: %s", RAG_QUERY_ENDPOINT)
+        formatted_content: str
+        session_id = bridge_payload.get("session_id")
+        cache_key = (
+            (session_id, bridge_payload["user_message"], len(conversation_context))
+            if session_id and not session_id.startswith("generated_")
+            else None
+        )
+        try:
+            rag_payload = (
+                self._rag_cache.get(cache_key) if cache_key is not None else None
+            )
+
+            if rag_payload is not None:
+                logger.debug("Using cached HA‑RAG response for %s", session_id)
+            else:
+                async with httpx.AsyncClient(timeout=10) as client:
+                    logger.debug(
+                        "Sending request to RAG_QUERY_ENDPOINT with payload: %s",
+                        {
+                            **bridge_payload,
+                            "conversation_history": (
+                                f"[{len(conversation_context)} messages]"
+                                if conversation_context
+                                else None
+                            ),
+                        },
+                    )
+                    async with client.stream(
+                        "POST",
+                        RAG_QUERY_ENDPOINT,
+                        json=bridge_payload,
+                    ) as resp:
+                        resp.raise_for_status()
+                        body = await _read_capped_body(resp, RAG_RESPONSE_MAX_BYTES)
+                    logger.debug(
+                        "Received response from RAG_QUERY_ENDPOINT: %s, %d bytes",
+                        resp.status_code,
+                        len(body),
+                    )
+                    rag_payload = orjson.loads(body)
+
+                if cache_key is not None:
+                    self._rag_cache[cache_key] = rag_payload
+
+            # Handle new bridge response format: first user message with home context
+            user_context = next(
+                (
+                    msg.get("content", "")
+                    for msg in rag_payload.get("messages", ())
+                    if msg.get("role") == "user"
+                    and "Current home context:" in msg.get("content", "")
+                ),
+                None,
+            )
+
+            if user_context:
+                formatted_content = user_context
+            else:
+                # Fallback: try old format for backward compatibility
+                formatted_content = rag_payload.get("formatted_content")
+                if not formatted_content:
+                    entities = rag_payload.get("relevant_entities", [])
+                    if entities:
+                        rows = [
+                            f"{e['entity_id']},{e.get('name', e['entity_id'])},{e.get('state', 'unknown')},{'/'.join(e.get('aliases', []))}"
+                            for e in entities
+                        ]
+                        formatted_content = _CSV_HEADER + "\n".join(rows) + _CSV_FOOTER
+                    else:
+                        formatted_content = _NO_ENTITIES_CONTEXT
+        except Exception as exc:  # noqa: BLE001
+            logger.exception("HA‑RAG query failed: %s", exc)
+            formatted_content = "Error retrieving Home Assistant entities."
+
+        return formatted_content
+
     # ────────────────────────────────
     # Post‑call: execute HA tools
     # ────────────────────────────────
@@ -562,29 +684,12 @@ class HARagHook(CustomLogger):
             return response
 
         # Filter Home‑Assistant calls
-        ha_calls: List[Dict[str, Any]] = []
-        for call in tool_calls:
-            func = call.get("function", {})
-            name: str = func.get("name", "")
-            if name.startswith("homeassistant.") or (
-                "." in name
-                and name.split(".", 1)[0]
-                in {
-                    "light",
-                    "switch",
-                    "climate",
-                    "sensor",
-                    "media_player",
-                    "scene",
-                    "script",
-                    "automation",
-                    "cover",
-                    "fan",
-                    "input_boolean",
-                    "notify",
-                }
-            ):
-                ha_calls.append(call)
+        ha_calls: List[Dict[str, Any]] = [
+            call
+            for call in tool_calls
+            if (parts := (call.get("function") or {}).get("name", "").partition("."))[1]
+            and parts[0] in _HA_TOOL_DOMAINS
+        ]
 
         if not ha_calls:
             return response  # nothing to execute
@@ -600,7 +705,7 @@ class HARagHook(CustomLogger):
                     json={"tool_calls": ha_calls},
                 )
                 exec_resp.raise_for_status()
-                exec_payload = exec_resp.json()
+                exec_payload = orjson.loads(exec_resp.content)
         except Exception as exc:  # noqa: BLE001
             logger.exception("Tool execution via HA‑RAG bridge failed: %s", exc)
             return response
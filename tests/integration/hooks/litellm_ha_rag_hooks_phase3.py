@@ -17,12 +17,18 @@ litellm_settings:
 
 from __future__ import annotations
 
+import asyncio
+import functools
+import hashlib
 import logging
 import os
 import re
+from datetime import datetime
 from typing import TYPE_CHECKING, Any, Dict, List
 
 import httpx
+import orjson
+from cachetools import TTLCache
 from litellm.integrations.custom_logger import CustomLogger
 from litellm.types.utils import LLMResponseTypes
 
@@ -31,37 +37,33 @@ HAS_TRANSLATION = False
 get_translation_service = None
 
 
-def extract_entity_ids_from_prompt(prompt_text: str) -> List[str]:
-    """Extract entity IDs and entity data from prompt text for entity proof tracking."""
-    # Look for explicit entity IDs in common patterns
-    entity_id_patterns = [
-        r"\b(sensor\.[a-zA-Z0-9_]+)",
-        r"\b(light\.[a-zA-Z0-9_]+)",
-        r"\b(switch\.[a-zA-Z0-9_]+)",
-        r"\b(climate\.[a-zA-Z0-9_]+)",
-        r"\b(cover\.[a-zA-Z0-9_]+)",
-        r"\b(binary_sensor\.[a-zA-Z0-9_]+)",
-    ]
-
-    entity_ids = set()
-    for pattern in entity_id_patterns:
-        matches = re.findall(pattern, prompt_text, re.IGNORECASE)
-        entity_ids.update(matches)
-
-    # Also look for entity data patterns from bridge context (like "Temperature: 23.7 °C")
-    entity_data_patterns = [
+# Entity IDs and bridge-context data markers used for entity proof tracking
+# HA entity IDs are lowercase by convention, so no IGNORECASE on the domain part
+_ENTITY_ID_RE = re.compile(
+    r"\b((?:sensor|light|switch|climate|cover|binary_sensor)\.[a-zA-Z0-9_]+)"
+)
+_ENTITY_DATA_PATTERNS = tuple(
+    re.compile(pattern, re.IGNORECASE)
+    for pattern in (
         r"Temperature:\s*[\d.]+\s*°C",
         r"Power:\s*[\d.]+\s*W",
         r"Humidity:\s*[\d.]+\s*%",
         r"State:\s*\w+",
         r"\[P\]\s+\w+:\s*[\d.]+",  # Primary entity format: [P] Temperature: 23.7 °C
         r"\[R\]\s+[\w\s]+",  # Related entity format: [R] Entity Name
-    ]
+    )
+)
+
+
+def extract_entity_ids_from_prompt(prompt_text: str) -> List[str]:
+    """Extract entity IDs and entity data from prompt text for entity proof tracking."""
+    # Look for explicit entity IDs in common patterns
+    entity_ids = set(_ENTITY_ID_RE.findall(prompt_text))
 
+    # Also look for entity data patterns from bridge context (like "Temperature: 23.7 °C")
     entity_data_found = []
-    for pattern in entity_data_patterns:
-        matches = re.findall(pattern, prompt_text, re.IGNORECASE)
-        entity_data_found.extend(matches)
+    for pattern in _ENTITY_DATA_PATTERNS:
+        entity_data_found.extend(pattern.findall(prompt_text))
 
     # Combine entity IDs and entity data indicators
     all_entities = list(entity_ids) + [f"data:{data}" for data in entity_data_found]
@@ -89,39 +91,135 @@ TOOL_EXECUTION_ENDPOINT: str = f"{HA_RAG_API_URL}/execute_tool"
 # Tool‑execution behaviour: "ha-rag-bridge"|"caller"|"both"|"disabled"
 TOOL_EXECUTION_MODE: str = os.getenv("HA_RAG_TOOL_EXECUTION_MODE", "ha-rag-bridge")
 
+# Tool-call name prefixes ("<domain>.<service>") executed through the bridge
+_HA_TOOL_DOMAINS = frozenset(
+    {
+        "homeassistant",
+        "light",
+        "switch",
+        "climate",
+        "sensor",
+        "media_player",
+        "scene",
+        "script",
+        "automation",
+        "cover",
+        "fan",
+        "input_boolean",
+        "notify",
+    }
+)
+
+# Bodies are encoded with orjson, so the content type is set explicitly
+_JSON_HEADERS: Dict[str, str] = {"content-type": "application/json"}
+
+# Connection pool size for the shared bridge client
+HTTP_POOL_SIZE: int = int(os.getenv("HA_RAG_HTTP_POOL_SIZE", "100"))
+
+# Workflow results are reused when the same chat sends the same question again
+# within the TTL (regenerate/retry, client resends); needs a stable session ID
+WORKFLOW_CACHE_TTL_S: float = float(os.getenv("HA_RAG_CACHE_TTL_S", "30"))
+WORKFLOW_CACHE_MAXSIZE: int = 2048
+
+# Upper bound on the Phase 3 workflow call made from the pre-call hook
+PRIMARY_TIMEOUT_S: float = float(os.getenv("HA_RAG_PRIMARY_TIMEOUT", "8"))
+
+# Injected-context preview logging; set to 0 to skip it entirely
+CONTEXT_PREVIEW: bool = os.getenv("HA_RAG_CONTEXT_PREVIEW", "1") == "1"
+
 # ──────────────────────────────────────────────────────────────────────────────
 # Logging
 # ──────────────────────────────────────────────────────────────────────────────
 
-logging.basicConfig(
-    level=logging.DEBUG,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-)
+# Handlers are owned by the host (LiteLLM proxy); only our own logger's level
+# is set here so importing the hook doesn't force DEBUG on the whole process.
 logger = logging.getLogger("litellm_ha_rag_hook_phase3")
+logger.setLevel(os.getenv("HA_RAG_HOOK_LOG_LEVEL", "INFO").upper())
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Shared HTTP client ─ keeps TCP connections to the bridge alive between calls
+# ──────────────────────────────────────────────────────────────────────────────
+
+_HTTP_CLIENT: httpx.AsyncClient | None = None
+
+
+def _get_http_client() -> httpx.AsyncClient:
+    """Return the pooled client used for every async bridge call."""
+    global _HTTP_CLIENT
+    if _HTTP_CLIENT is None or _HTTP_CLIENT.is_closed:
+        _HTTP_CLIENT = httpx.AsyncClient(
+            timeout=30.0,
+            limits=httpx.Limits(
+                max_connections=HTTP_POOL_SIZE,
+                max_keepalive_connections=HTTP_POOL_SIZE,
+                keepalive_expiry=30.0,
+            ),
+        )
+    return _HTTP_CLIENT
+
+
+# Bridge origins the hook talks to: HA_RAG_API_URL (shared with the tool endpoint)
+# and the pre-call hook's fixed Docker URL, which coincide with the defaults
+_PREWARM_URLS = tuple(dict.fromkeys((HA_RAG_API_URL, "http://bridge:8000")))
+
+
+async def _prewarm_connections() -> None:
+    """Open pooled connections to the bridge so user requests skip the handshake."""
+    client = _get_http_client()
+    results = await asyncio.gather(
+        *(client.head(url, timeout=5.0) for url in _PREWARM_URLS),
+        return_exceptions=True,
+    )
+    for url, result in zip(_PREWARM_URLS, results):
+        if isinstance(result, Exception):
+            logger.debug("Bridge pre-warm to %s failed: %s", url, result)
+
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Helper functions (reuse from original hook with enhancements)
 # ──────────────────────────────────────────────────────────────────────────────
 
+# OpenWebUI metadata task markers (title/tag generation prompts)
+_METADATA_RE = re.compile(
+    r"### Task:"
+    r"|Generate a concise, 3-5 word title"
+    r"|Generate 1-3 broad tags categorizing"
+    r"|main themes of the chat history"
+    r"|### Guidelines:"
+    r"|### Output:"
+    r"|JSON format:",
+    re.IGNORECASE,
+)
+# Message roles carried over into the bridge conversation context
+_CONTEXT_ROLES = frozenset({"user", "assistant", "system"})
+_CHAT_HISTORY_RE = re.compile(r"<chat_history>(.*?)</chat_history>", re.DOTALL)
+_USER_QUESTION_RE = re.compile(
+    r"USER:\s*(.+?)(?=\nASSISTANT:|$)", re.DOTALL | re.MULTILINE
+)
+# One chat-history turn: marker at the start of a line, content up to the next marker
+_CHAT_TURN_RE = re.compile(
+    r"(?:^|\n)(USER|ASSISTANT):(.*?)(?=\n(?:USER|ASSISTANT):|\Z)", re.DOTALL
+)
+
+
+def _message_text(content: Any) -> str:
+    """Return message content as text, joining the text parts of multimodal lists."""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(
+            part.get("text", "")
+            for part in content
+            if isinstance(part, dict) and part.get("type") == "text"
+        )
+    return str(content)
+
 
 def _extract_user_question_and_context(
     messages: List[Dict[str, Any]],
 ) -> tuple[str | None, List[Dict[str, Any]]]:
     """Extract the LAST user question and full conversation context."""
-    import re
-
-    logger.debug(f"Extracting user question and context from {len(messages)} messages")
-
-    # OpenWebUI metadata task patterns
-    metadata_patterns = [
-        r"### Task:",
-        r"Generate a concise, 3-5 word title",
-        r"Generate 1-3 broad tags categorizing",
-        r"main themes of the chat history",
-        r"### Guidelines:",
-        r"### Output:",
-        r"JSON format:",
-    ]
+    logger.debug("Extracting user question and context from %d messages", len(messages))
 
     # Check if the last message is a metadata task
     if messages:
@@ -129,26 +227,17 @@ def _extract_user_question_and_context(
         if (
             last_msg.get("role") == "user"
             and isinstance(last_msg.get("content"), str)
-            and any(
-                re.search(pattern, last_msg["content"], re.IGNORECASE)
-                for pattern in metadata_patterns
-            )
+            and _METADATA_RE.search(last_msg["content"]) is not None
         ):
 
             logger.debug("Last message is OpenWebUI metadata task")
             # Extract the actual conversation from chat history
-            chat_history_match = re.search(
-                r"<chat_history>(.*?)</chat_history>", last_msg["content"], re.DOTALL
-            )
+            chat_history_match = _CHAT_HISTORY_RE.search(last_msg["content"])
             if chat_history_match:
                 chat_content = chat_history_match.group(1)
-                logger.debug(f"Found chat history: '{chat_content[:200]}...'")
+                logger.debug("Found chat history: '%.200s...'", chat_content)
                 # Find the last USER question (most recent)
-                user_questions = re.findall(
-                    r"USER:\s*(.+?)(?=\nASSISTANT:|$)",
-                    chat_content,
-                    re.DOTALL | re.MULTILINE,
-                )
+                user_questions = _USER_QUESTION_RE.findall(chat_content)
                 if user_questions:
                     question = user_questions[-1].strip()
                     logger.info(
@@ -161,20 +250,20 @@ def _extract_user_question_and_context(
             logger.debug("No valid chat history in metadata task")
             return None, []
 
-    # For regular conversations, find the LAST user message
-    last_user_question = None
-    conversation_context = []
-
-    # Build full conversation context and find last user message
-    for msg in messages:
-        if msg.get("role") in ["user", "assistant", "system"]:
-            conversation_context.append(
-                {"role": msg.get("role"), "content": str(msg.get("content", ""))}
-            )
-
-            # Track the last user message
-            if msg.get("role") == "user":
-                last_user_question = str(msg.get("content", "")).strip()
+    # For regular conversations, build full context and find the LAST user message
+    conversation_context = [
+        {"role": msg["role"], "content": _message_text(msg.get("content", ""))}
+        for msg in messages
+        if msg.get("role") in _CONTEXT_ROLES
+    ]
+    last_user_question = next(
+        (
+            msg["content"].strip()
+            for msg in reversed(conversation_context)
+            if msg["role"] == "user"
+        ),
+        None,
+    )
 
     if last_user_question:
         logger.info(f"Using LAST user question: '{last_user_question[:100]}...'")
@@ -186,75 +275,70 @@ def _extract_user_question_and_context(
 
 def _parse_chat_history(chat_content: str) -> List[Dict[str, Any]]:
     """Parse OpenWebUI chat history format into conversation context."""
-    import re
+    turns = (
+        (match.group(1).lower(), match.group(2).strip())
+        for match in _CHAT_TURN_RE.finditer(chat_content)
+    )
+    return [{"role": role, "content": content} for role, content in turns if content]
 
-    conversation = []
 
-    # Split by USER/ASSISTANT markers
-    parts = re.split(r"\n(USER:|ASSISTANT:)", chat_content)
+_EXPLICIT_SESSION_FIELDS = ("session_id", "conversation_id", "chat_id")
 
-    current_role = None
-    current_content = ""
 
-    for i, part in enumerate(parts):
-        part = part.strip()
-        if part == "USER:":
-            if current_role and current_content:
-                conversation.append(
-                    {"role": current_role, "content": current_content.strip()}
-                )
-            current_role = "user"
-            current_content = ""
-        elif part == "ASSISTANT:":
-            if current_role and current_content:
-                conversation.append(
-                    {"role": current_role, "content": current_content.strip()}
-                )
-            current_role = "assistant"
-            current_content = ""
-        else:
-            if current_role:
-                current_content += part
+def _non_empty_str(value: Any) -> str | None:
+    """Return ``value`` if it is a non-empty string, else None."""
+    return value if isinstance(value, str) and value else None
 
-    # Add the last message
-    if current_role and current_content:
-        conversation.append({"role": current_role, "content": current_content.strip()})
 
-    return conversation
+@functools.lru_cache(maxsize=1024)
+def _session_from_headers(
+    chat_id: str | None, user_id: str | None, explicit: tuple[str | None, ...]
+) -> str | None:
+    """Resolve a session ID from OpenWebUI header values and explicit data fields."""
+    # Priority 1: OpenWebUI Standard Headers (ENABLE_FORWARD_USER_INFO_HEADERS=true)
+    if chat_id:
+        logger.debug("Using OpenWebUI standard chat ID: %s", chat_id)
+        return chat_id
 
+    if user_id:
+        # If no chat_id but have user_id, create session-like ID
+        # This is NOT ideal for multi-chat per user, but better than nothing
+        logger.debug("Using OpenWebUI user ID as session fallback: %s", user_id)
+        return f"user_{user_id}_session"
 
-def _extract_stable_session_id(data: dict, messages: List[Dict[str, Any]]) -> str:
-    """Extract stable session ID from OpenWebUI standard headers or generate fallback."""
-    from datetime import datetime
+    # Priority 2: Look for explicit session fields in data
+    for field, session_value in zip(_EXPLICIT_SESSION_FIELDS, explicit):
+        if session_value:
+            logger.debug("Using explicit session ID from %s: %s", field, session_value)
+            return session_value
 
-    # Priority 1: OpenWebUI Standard Headers (ENABLE_FORWARD_USER_INFO_HEADERS=true)
+    return None
+
+
+def _stable_session_id(data: dict) -> str | None:
+    """Return the session ID from OpenWebUI headers or explicit fields, if any."""
+    chat_id = user_id = None
     headers = data.get("headers", {})
     if isinstance(headers, dict):
-        # Check for OpenWebUI standard chat ID header (newest standard)
-        chat_id = headers.get("x-openwebui-chat-id") or headers.get(
-            "X-OpenWebUI-Chat-Id"
+        # OpenWebUI standard chat ID header (newest standard), user ID as fallback
+        chat_id = _non_empty_str(
+            headers.get("x-openwebui-chat-id") or headers.get("X-OpenWebUI-Chat-Id")
         )
-        if chat_id and isinstance(chat_id, str) and len(chat_id) > 0:
-            logger.debug(f"Using OpenWebUI standard chat ID: {chat_id}")
-            return chat_id
-
-        # Check for other OpenWebUI headers as fallback
-        user_id = headers.get("x-openwebui-user-id") or headers.get(
-            "X-OpenWebUI-User-Id"
+        user_id = _non_empty_str(
+            headers.get("x-openwebui-user-id") or headers.get("X-OpenWebUI-User-Id")
         )
-        if user_id and isinstance(user_id, str) and len(user_id) > 0:
-            # If no chat_id but have user_id, create session-like ID
-            # This is NOT ideal for multi-chat per user, but better than nothing
-            logger.debug(f"Using OpenWebUI user ID as session fallback: {user_id}")
-            return f"user_{user_id}_session"
 
-    # Priority 2: Look for explicit session fields in data
-    explicit_session_fields = ["session_id", "conversation_id", "chat_id"]
-    for field in explicit_session_fields:
-        session_value = data.get(field)
-        if session_value and isinstance(session_value, str) and len(session_value) > 0:
-            logger.debug(f"Using explicit session ID from {field}: {session_value}")
-            return session_value
+    explicit = tuple(
+        _non_empty_str(data.get(field)) for field in _EXPLICIT_SESSION_FIELDS
+    )
+    return _session_from_headers(chat_id, user_id, explicit)
+
+
+def _extract_stable_session_id(data: dict, messages: List[Dict[str, Any]]) -> str:
+    """Extract stable session ID from OpenWebUI standard headers or generate fallback."""
+    session_id = _stable_session_id(data)
+    if session_id:
+        return session_id
 
     # Priority 3: Generate unique session ID for new conversations
     # Each new conversation gets a unique ID - no cross-conversation contamination!
@@ -263,7 +347,7 @@ def _extract_stable_session_id(data: dict, messages: List[Dict[str, Any]]) -> st
     )  # microsecond precision
     session_id = f"generated_{unique_timestamp}"
 
-    logger.debug(f"Generated unique session ID: {session_id}")
+    logger.debug("Generated unique session ID: %s", session_id)
     logger.info(
         "No OpenWebUI chat_id found - recommend enabling ENABLE_FORWARD_USER_INFO_HEADERS=true"
     )
@@ -283,6 +367,26 @@ class HARagHookPhase3(CustomLogger):
 
         # Translation service removed - using multilingual embedding approach
         self.translation_service = None
+
+        # Phase 3 workflow results keyed by (stable session ID, question digest);
+        # in-flight calls are tracked per key so concurrent duplicates share one
+        self._workflow_cache: TTLCache = TTLCache(
+            maxsize=WORKFLOW_CACHE_MAXSIZE, ttl=WORKFLOW_CACHE_TTL_S
+        )
+        self._workflow_inflight: Dict[
+            tuple[str, str], asyncio.Task[Dict[str, Any] | None]
+        ] = {}
+
+        # The proxy imports callbacks from its async config loading at startup,
+        # so a loop is running here and the pool is warm before the first user
+        # request; outside the proxy (scripts, tests) there is nothing to warm
+        self._prewarm_task: asyncio.Task | None = None
+        try:
+            self._prewarm_task = asyncio.get_running_loop().create_task(
+                _prewarm_connections()
+            )
+        except RuntimeError:
+            pass
         logger.info("Using multilingual embeddings - no translation needed")
 
         logger.info(
@@ -409,15 +513,18 @@ class HARagHookPhase3(CustomLogger):
                         with httpx.Client(timeout=15.0) as client:
                             response = client.post(
                                 f"{bridge_url}/process-request-workflow",
-                                json={
-                                    "user_message": user_msg,
-                                    "conversation_history": conversation_history,
-                                    "session_id": session_id,
-                                },
+                                content=orjson.dumps(
+                                    {
+                                        "user_message": user_msg,
+                                        "conversation_history": conversation_history,
+                                        "session_id": session_id,
+                                    }
+                                ),
+                                headers=_JSON_HEADERS,
                             )
 
                             if response.status_code == 200:
-                                workflow_result = response.json()
+                                workflow_result = orjson.loads(response.content)
                                 formatted_context = workflow_result.get(
                                     "formatted_content", ""
                                 )
@@ -509,35 +616,46 @@ class HARagHookPhase3(CustomLogger):
                     logger.info(
                         f"🌉 REAL PRE: Calling bridge at: {bridge_url} with {len(conversation_history)} conversation messages"
                     )
-                    async with httpx.AsyncClient(timeout=30.0) as client:
-                        # Call workflow
-                        response = await client.post(
-                            f"{bridge_url}/process-request-workflow",
-                            json={
-                                "user_message": user_msg,
-                                "conversation_history": conversation_history,
-                                "session_id": session_id,
-                            },
+                    # Only cache when the chat has a stable ID; a generated one is
+                    # unique per call and could never be hit again
+                    stable_session_id = _stable_session_id(data)
+                    cache_key = (
+                        (
+                            stable_session_id,
+                            hashlib.blake2b(
+                                str(user_msg).encode(), digest_size=16
+                            ).hexdigest(),
                         )
+                        if stable_session_id
+                        else None
+                    )
+                    workflow_result = await self._cached_workflow_result(
+                        cache_key,
+                        f"{bridge_url}/process-request-workflow",
+                        {
+                            "user_message": user_msg,
+                            "conversation_history": conversation_history,
+                            "session_id": session_id,
+                        },
+                    )
 
-                        if response.status_code == 200:
-                            workflow_result = response.json()
-                            formatted_context = workflow_result.get(
-                                "formatted_content", ""
-                            )
+                    if workflow_result is not None:
+                        formatted_context = workflow_result.get("formatted_content", "")
 
-                            if formatted_context and formatted_context.strip():
-                                # Inject real context from workflow
-                                system_msg = {
-                                    "role": "system",
-                                    "content": formatted_context,
-                                }
-                                data["messages"].insert(0, system_msg)
-                                logger.info(
-                                    f"✅ REAL PRE-CALL: HA context injected ({len(formatted_context)} chars)"
-                                )
+                        if formatted_context and formatted_context.strip():
+                            # Inject real context from workflow
+                            system_msg = {
+                                "role": "system",
+                                "content": formatted_context,
+                            }
+                            data["messages"].insert(0, system_msg)
+                            logger.info(
+                                f"✅ REAL PRE-CALL: HA context injected ({len(formatted_context)} chars)"
+                            )
 
-                                # Log what we actually injected for debugging
+                            # Log what we actually injected for debugging; skip the
+                            # preview when nobody will see it
+                            if CONTEXT_PREVIEW and logger.isEnabledFor(logging.INFO):
                                 context_preview = formatted_context[:200].replace(
                                     "\n", " "
                                 )
@@ -545,20 +663,16 @@ class HARagHookPhase3(CustomLogger):
                                     f"📋 REAL PRE Context preview: {context_preview}..."
                                 )
 
-                                # Store trace info for debugging
-                                entities_count = len(
-                                    workflow_result.get("retrieved_entities", [])
-                                )
-                                logger.info(
-                                    f"📊 REAL PRE Workflow stats: {entities_count} entities retrieved"
-                                )
-                            else:
-                                logger.warning(
-                                    "⚠️ REAL PRE: Workflow returned empty context"
-                                )
+                            # Store trace info for debugging
+                            entities_count = len(
+                                workflow_result.get("retrieved_entities", [])
+                            )
+                            logger.info(
+                                f"📊 REAL PRE Workflow stats: {entities_count} entities retrieved"
+                            )
                         else:
-                            logger.error(
-                                f"❌ REAL PRE: Workflow call failed: {response.status_code}"
+                            logger.warning(
+                                "⚠️ REAL PRE: Workflow returned empty context"
                             )
                 else:
                     logger.info("🚫 REAL PRE: Context already injected, skipping")
@@ -569,6 +683,67 @@ class HARagHookPhase3(CustomLogger):
 
         return data
 
+    async def _cached_workflow_result(
+        self, cache_key: tuple[str, str] | None, url: str, payload: Dict[str, Any]
+    ) -> Dict[str, Any] | None:
+        """Return the workflow result for ``cache_key``, calling the bridge once.
+
+        A ``None`` key (no stable session ID) always calls the bridge uncached.
+        """
+        if cache_key is None:
+            return await self._call_workflow(url, payload)
+
+        cached = self._workflow_cache.get(cache_key)
+        if cached is not None:
+            logger.info(
+                f"♻️ REAL PRE: Reusing cached workflow result for {cache_key[0]}"
+            )
+            return cached
+
+        # Concurrent identical requests await the same in-flight call, so they
+        # share its result, its failure and its PRIMARY_TIMEOUT_S deadline
+        task = self._workflow_inflight.get(cache_key)
+        if task is None:
+            task = asyncio.create_task(self._call_workflow(url, payload))
+            self._workflow_inflight[cache_key] = task
+            task.add_done_callback(
+                lambda _, key=cache_key: self._workflow_inflight.pop(key, None)
+            )
+
+        # Shielded so one cancelled caller doesn't cancel the call for the others
+        workflow_result = await asyncio.shield(task)
+        if workflow_result is not None:
+            self._workflow_cache[cache_key] = workflow_result
+        return workflow_result
+
+    async def _call_workflow(
+        self, url: str, payload: Dict[str, Any]
+    ) -> Dict[str, Any] | None:
+        """POST ``payload`` to the Phase 3 workflow; None on timeout or non-200."""
+        # Bound the whole round trip, not just individual socket reads, so
+        # a hung workflow can't hold the LLM call for the full 30 s
+        try:
+            response = await asyncio.wait_for(
+                _get_http_client().post(
+                    url,
+                    content=orjson.dumps(payload),
+                    headers=_JSON_HEADERS,
+                    timeout=30.0,
+                ),
+                timeout=PRIMARY_TIMEOUT_S,
+            )
+        except asyncio.TimeoutError:
+            logger.error(
+                f"⏱️ REAL PRE: Workflow call timed out after {PRIMARY_TIMEOUT_S}s"
+            )
+            return None
+
+        if response.status_code != 200:
+            logger.error(f"❌ REAL PRE: Workflow call failed: {response.status_code}")
+            return None
+
+        return orjson.loads(response.content)
+
     # ALTERNATIVE PRE-CALL HOOK (Method 2: async_log_pre_api_call)
     async def async_log_pre_api_call(self, model, messages, kwargs):
         """Alternative pre-call hook method - might be more reliable."""
@@ -615,55 +790,55 @@ class HARagHookPhase3(CustomLogger):
                             f"🌉 LOG PRE: Calling bridge at: {bridge_url} with {len(conversation_history)} conversation messages"
                         )
 
-                        async with httpx.AsyncClient(timeout=15.0) as client:
-                            response = await client.post(
-                                f"{bridge_url}/process-request-workflow",
-                                json={
+                        client = _get_http_client()
+                        response = await client.post(
+                            f"{bridge_url}/process-request-workflow",
+                            content=orjson.dumps(
+                                {
                                     "user_message": user_msg,
                                     "conversation_history": conversation_history,
                                     "session_id": session_id,
-                                },
+                                }
+                            ),
+                            headers=_JSON_HEADERS,
+                            timeout=15.0,
+                        )
+
+                        if response.status_code == 200:
+                            workflow_result = orjson.loads(response.content)
+                            formatted_context = workflow_result.get(
+                                "formatted_content", ""
                             )
 
-                            if response.status_code == 200:
-                                workflow_result = response.json()
-                                formatted_context = workflow_result.get(
-                                    "formatted_content", ""
+                            if formatted_context and formatted_context.strip():
+                                # Inject real context from workflow
+                                system_msg = {
+                                    "role": "system",
+                                    "content": formatted_context,
+                                }
+                                messages.insert(0, system_msg)
+                                logger.info(
+                                    f"✅ PRE-API: Real HA context injected ({len(formatted_context)} chars)"
                                 )
-
-                                if formatted_context and formatted_context.strip():
-                                    # Inject real context from workflow
-                                    system_msg = {
-                                        "role": "system",
-                                        "content": formatted_context,
-                                    }
-                                    messages.insert(0, system_msg)
-                                    logger.info(
-                                        f"✅ PRE-API: Real HA context injected ({len(formatted_context)} chars)"
-                                    )
-                                else:
-                                    # Fallback to static test message
-                                    system_msg = {
-                                        "role": "system",
-                                        "content": "A konyhában jelenleg 26.1°C van a szenzor szerint.",
-                                    }
-                                    messages.insert(0, system_msg)
-                                    logger.info(
-                                        "✅ PRE-API: Static test context injected"
-                                    )
                             else:
-                                logger.error(
-                                    f"❌ PRE-API: Workflow call failed: {response.status_code}"
-                                )
-                                # Fallback static message
+                                # Fallback to static test message
                                 system_msg = {
                                     "role": "system",
                                     "content": "A konyhában jelenleg 26.1°C van a szenzor szerint.",
                                 }
                                 messages.insert(0, system_msg)
-                                logger.info(
-                                    "✅ PRE-API: Static fallback context injected"
-                                )
+                                logger.info("✅ PRE-API: Static test context injected")
+                        else:
+                            logger.error(
+                                f"❌ PRE-API: Workflow call failed: {response.status_code}"
+                            )
+                            # Fallback static message
+                            system_msg = {
+                                "role": "system",
+                                "content": "A konyhában jelenleg 26.1°C van a szenzor szerint.",
+                            }
+                            messages.insert(0, system_msg)
+                            logger.info("✅ PRE-API: Static fallback context injected")
 
                     except Exception as e:
                         logger.error(f"❌ PRE-API Hook error: {e}")
@@ -738,15 +913,18 @@ class HARagHookPhase3(CustomLogger):
                             with httpx.Client(timeout=15.0) as client:
                                 response = client.post(
                                     f"{bridge_url}/process-request-workflow",
-                                    json={
-                                        "user_message": user_msg,
-                                        "conversation_history": conversation_history,
-                                        "session_id": session_id,
-                                    },
+                                    content=orjson.dumps(
+                                        {
+                                            "user_message": user_msg,
+                                            "conversation_history": conversation_history,
+                                            "session_id": session_id,
+                                        }
+                                    ),
+                                    headers=_JSON_HEADERS,
                                 )
 
                                 if response.status_code == 200:
-                                    workflow_result = response.json()
+                                    workflow_result = orjson.loads(response.content)
                                     formatted_context = workflow_result.get(
                                         "formatted_content", ""
                                     )
@@ -858,55 +1036,57 @@ class HARagHookPhase3(CustomLogger):
                         logger.info(
                             f"🌉 ASYNC LOG: Calling bridge at: {bridge_url} with {len(conversation_history)} conversation messages"
                         )
-                        async with httpx.AsyncClient(timeout=30.0) as client:
-                            # Call workflow
-                            response = await client.post(
-                                f"{bridge_url}/process-request-workflow",
-                                json={
+                        client = _get_http_client()
+                        # Call workflow
+                        response = await client.post(
+                            f"{bridge_url}/process-request-workflow",
+                            content=orjson.dumps(
+                                {
                                     "user_message": user_msg,
                                     "conversation_history": conversation_history,
                                     "session_id": session_id,
-                                },
+                                }
+                            ),
+                            headers=_JSON_HEADERS,
+                            timeout=30.0,
+                        )
+
+                        if response.status_code == 200:
+                            workflow_result = orjson.loads(response.content)
+                            formatted_context = workflow_result.get(
+                                "formatted_content", ""
                             )
 
-                            if response.status_code == 200:
-                                workflow_result = response.json()
-                                formatted_context = workflow_result.get(
-                                    "formatted_content", ""
+                            if formatted_context and formatted_context.strip():
+                                # Inject real context from workflow
+                                system_msg = {
+                                    "role": "system",
+                                    "content": formatted_context,
+                                }
+                                kwargs["messages"].insert(0, system_msg)
+                                logger.info(
+                                    f"✅ REAL HA context injected PRE-request ({len(formatted_context)} chars)"
                                 )
 
-                                if formatted_context and formatted_context.strip():
-                                    # Inject real context from workflow
-                                    system_msg = {
-                                        "role": "system",
-                                        "content": formatted_context,
-                                    }
-                                    kwargs["messages"].insert(0, system_msg)
-                                    logger.info(
-                                        f"✅ REAL HA context injected PRE-request ({len(formatted_context)} chars)"
-                                    )
-
-                                    # Log what we actually injected for debugging
-                                    context_preview = formatted_context[:200].replace(
-                                        "\n", " "
-                                    )
-                                    logger.info(
-                                        f"📋 Context preview: {context_preview}..."
-                                    )
+                                # Log what we actually injected for debugging
+                                context_preview = formatted_context[:200].replace(
+                                    "\n", " "
+                                )
+                                logger.info(f"📋 Context preview: {context_preview}...")
 
-                                    # Store trace info for debugging
-                                    entities_count = len(
-                                        workflow_result.get("retrieved_entities", [])
-                                    )
-                                    logger.info(
-                                        f"📊 Workflow stats: {entities_count} entities retrieved"
-                                    )
-                                else:
-                                    logger.warning("⚠️ Workflow returned empty context")
-                            else:
-                                logger.error(
-                                    f"❌ Workflow call failed: {response.status_code}"
+                                # Store trace info for debugging
+                                entities_count = len(
+                                    workflow_result.get("retrieved_entities", [])
+                                )
+                                logger.info(
+                                    f"📊 Workflow stats: {entities_count} entities retrieved"
                                 )
+                            else:
+                                logger.warning("⚠️ Workflow returned empty context")
+                        else:
+                            logger.error(
+                                f"❌ Workflow call failed: {response.status_code}"
+                            )
                     else:
                         logger.info("🚫 Context already injected, skipping")
 
@@ -961,37 +1141,35 @@ class HARagHookPhase3(CustomLogger):
         """Execute Home‑Assistant tool calls after a successful LLM call and translate response if needed."""
         logger.info("🔚 HA RAG Hook Phase 3: Post-call processing started")
 
+        # Resolve the first choice's message once; both the preview logging and
+        # the tool execution below work from it
+        choices = getattr(response, "choices", None) or ()
+        msg = getattr(choices[0], "message", None) if choices else None
+        tool_calls = getattr(msg, "tool_calls", None) or ()
+
         # Log LLM response preview for debugging
-        if hasattr(response, "choices") and response.choices:
-            choice = response.choices[0]
-            if hasattr(choice, "message") and hasattr(choice.message, "content"):
-                response_content = choice.message.content or ""
-                logger.info(f"🤖 LLM RESPONSE PREVIEW: {response_content[:200]}...")
-
-                # Check if response mentions temperature/entities we're looking for
-                if (
-                    "hőmérséklet" in response_content.lower()
-                    or "temperature" in response_content.lower()
-                ):
-                    logger.info("✅ Response contains temperature information")
-                else:
-                    logger.warning(
-                        "⚠️ Response may be missing expected temperature data"
-                    )
+        if msg is not None and hasattr(msg, "content"):
+            response_content = msg.content or ""
+            logger.info(f"🤖 LLM RESPONSE PREVIEW: {response_content[:200]}...")
+
+            # Check if response mentions temperature/entities we're looking for
+            if (
+                "hőmérséklet" in response_content.lower()
+                or "temperature" in response_content.lower()
+            ):
+                logger.info("✅ Response contains temperature information")
+            else:
+                logger.warning("⚠️ Response may be missing expected temperature data")
 
-            # Log tool calls if any
-            if hasattr(choice.message, "tool_calls") and choice.message.tool_calls:
-                tool_names = [
-                    tc.function.name
-                    for tc in choice.message.tool_calls
-                    if hasattr(tc, "function")
-                ]
-                logger.info(f"🔧 TOOL CALLS: {tool_names}")
-
-        logger.debug(
-            f"Post-call hook data keys: {list(data.keys()) if data else 'None'}"
-        )
-        logger.debug(f"Response type: {type(response).__name__}")
+        # Log tool calls if any
+        if tool_calls:
+            tool_names = [
+                tc.function.name for tc in tool_calls if hasattr(tc, "function")
+            ]
+            logger.info(f"🔧 TOOL CALLS: {tool_names}")
+
+        logger.debug("Post-call hook data keys: %s", list(data) if data else None)
+        logger.debug("Response type: %s", type(response).__name__)
 
         # Response translation removed - LLM handles Hungarian natively with multilingual context
 
@@ -1004,43 +1182,17 @@ class HARagHookPhase3(CustomLogger):
         if execution_mode == "disabled":
             return response
 
-        # Ensure there is at least one tool call (re-fetch choices after potential translation)
-        choices = getattr(response, "choices", [])
-        if not choices:
-            return response
-
-        tool_calls = (
-            getattr(getattr(choices[0], "message", {}), "tool_calls", [])
-            if choices
-            else []
-        )
+        # Ensure there is at least one tool call
         if not tool_calls:
             return response
 
         # Filter Home‑Assistant calls
-        ha_calls: List[Dict[str, Any]] = []
-        for call in tool_calls:
-            func = call.get("function", {})
-            name: str = func.get("name", "")
-            if name.startswith("homeassistant.") or (
-                "." in name
-                and name.split(".", 1)[0]
-                in {
-                    "light",
-                    "switch",
-                    "climate",
-                    "sensor",
-                    "media_player",
-                    "scene",
-                    "script",
-                    "automation",
-                    "cover",
-                    "fan",
-                    "input_boolean",
-                    "notify",
-                }
-            ):
-                ha_calls.append(call)
+        ha_calls: List[Dict[str, Any]] = [
+            call
+            for call in tool_calls
+            if (parts := (call.get("function") or {}).get("name", "").partition("."))[1]
+            and parts[0] in _HA_TOOL_DOMAINS
+        ]
 
         if not ha_calls:
             return response  # nothing to execute
@@ -1050,13 +1202,15 @@ class HARagHookPhase3(CustomLogger):
 
         # ha‑rag‑bridge or both → execute via bridge
         try:
-            async with httpx.AsyncClient(timeout=15) as client:
-                exec_resp = await client.post(
-                    TOOL_EXECUTION_ENDPOINT,
-                    json={"tool_calls": ha_calls},
-                )
-                exec_resp.raise_for_status()
-                exec_payload = exec_resp.json()
+            client = _get_http_client()
+            exec_resp = await client.post(
+                TOOL_EXECUTION_ENDPOINT,
+                content=orjson.dumps({"tool_calls": ha_calls}),
+                headers=_JSON_HEADERS,
+                timeout=15,
+            )
+            exec_resp.raise_for_status()
+            exec_payload = orjson.loads(exec_resp.content)
         except Exception as exc:  # noqa: BLE001
             logger.exception("Tool execution via HA‑RAG bridge failed: %s", exc)
             return response
@@ -1,4 +1,6 @@
 import os
+import sys
+from types import SimpleNamespace
 from unittest.mock import MagicMock
 
 import ha_rag_bridge.bootstrap as boot
@@ -48,3 +50,60 @@ def test_run_dry_run(monkeypatch):
     code = boot.run(None, dry_run=True)
     assert code == 0
     assert not called
+
+
+def test_bootstrap_upgrades_from_schema_4(monkeypatch):
+    setup_env()
+    monkeypatch.setenv("EMBEDDING_BACKEND", "none")
+    # bootstrap.__main__ connects to Arango on import
+    monkeypatch.setitem(
+        sys.modules,
+        "ha_rag_bridge.bootstrap.__main__",
+        SimpleNamespace(ensure_arango_graph=lambda: None),
+    )
+    meta_col = MagicMock()
+    meta_col.get.return_value = {"_key": "schema_version", "value": 4}
+    # workflow_traces as left by the original migration 04
+    traces = MagicMock()
+    traces.properties.return_value = {}
+    traces.indexes.return_value = [
+        {"name": name, "id": f"workflow_traces/{name}"}
+        for name in (
+            "idx_session_start",
+            "idx_status_duration",
+            "idx_errors",
+            "idx_start_time",
+            "idx_ttl_cleanup",
+            "idx_session_id",
+            "idx_status",
+            "idx_duration",
+            "idx_user_query",
+        )
+    ]
+    db = MagicMock()
+    db.ensure_col.return_value = meta_col
+    db.collection.side_effect = lambda name: (
+        traces if name == "workflow_traces" else MagicMock()
+    )
+    db.views.return_value = [{"name": "v_workflow_traces"}]
+    db.has_view.return_value = True
+    sys_db = MagicMock()
+    sys_db.has_database.return_value = True
+    client = MagicMock()
+    client.db.side_effect = lambda name, **kw: sys_db if name == "_system" else db
+    monkeypatch.setattr(boot, "ArangoClient", MagicMock(return_value=client))
+
+    boot.bootstrap()
+
+    traces.configure.assert_called_once()
+    assert "computed_values" in traces.configure.call_args.kwargs
+    dropped = {call.args[0] for call in traces.delete_index.call_args_list}
+    assert dropped == {
+        "workflow_traces/idx_session_id",
+        "workflow_traces/idx_status",
+        "workflow_traces/idx_duration",
+        "workflow_traces/idx_user_query",
+    }
+    meta_col.insert.assert_called_with(
+        {"_key": "schema_version", "value": boot.SCHEMA_LATEST}, overwrite=True
+    )
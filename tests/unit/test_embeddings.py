@@ -1,8 +1,20 @@
 import os
 
 import httpx
+import pytest
 
-from app.services.integrations.embeddings import GeminiBackend
+from app.services.integrations.embeddings import GeminiBackend, get_backend
+from app.services.integrations.embeddings.backends import _get_backend
+from app.services.integrations.embeddings.cache import get_embedding_cache
+
+
+@pytest.fixture(autouse=True)
+def memory_only_embedding_cache(monkeypatch):
+    # Keep tests off the user's on-disk cache and isolated from each other
+    monkeypatch.setenv("EMBEDDING_CACHE_PATH", "")
+    get_embedding_cache.cache_clear()
+    yield
+    get_embedding_cache.cache_clear()
 
 
 def test_gemini_embed(monkeypatch):
@@ -20,3 +32,66 @@ def test_gemini_embed(monkeypatch):
     backend = GeminiBackend()
     vec = backend.embed(["hi"])[0]
     assert len(vec) == 1536
+
+
+def test_get_backend_is_memoized(monkeypatch):
+    monkeypatch.setenv("GEMINI_API_KEY", "key")
+    _get_backend.cache_clear()
+    try:
+        backend = get_backend("gemini")
+        assert isinstance(backend, GeminiBackend)
+        assert get_backend("gemini") is backend
+        assert get_backend("Gemini") is backend
+        assert _get_backend.cache_info().currsize == 1
+    finally:
+        _get_backend.cache_clear()
+
+
+def test_embed_cache_dedupes_and_persists(monkeypatch, tmp_path):
+    monkeypatch.setenv("GEMINI_API_KEY", "key")
+    monkeypatch.setenv("EMBEDDING_CACHE_PATH", str(tmp_path / "emb.sqlite"))
+    get_embedding_cache.cache_clear()
+    sent = []
+
+    def fake_post(*args, json=None, **kwargs):
+        texts = [r["content"]["parts"][0]["text"] for r in json["requests"]]
+        sent.append(texts)
+
+        class R:
+            status_code = 200
+
+            def json(self_inner):
+                return {"embeddings": [{"values": [float(len(t))]} for t in texts]}
+
+        return R()
+
+    monkeypatch.setattr(httpx, "post", fake_post)
+    backend = GeminiBackend()
+
+    assert backend.embed(["a", "bb", "a"]) == [[1.0], [2.0], [1.0]]
+    assert sent == [["a", "bb"]]
+
+    # A fresh process-level cache still finds the vectors on disk
+    get_embedding_cache.cache_clear()
+    assert backend.embed(["bb", "ccc"]) == [[2.0], [3.0]]
+    assert sent == [["a", "bb"], ["ccc"]]
+
+
+def test_embed_cache_prunes_least_recently_used_rows(monkeypatch, tmp_path):
+    from app.services.integrations.embeddings import cache as cache_module
+
+    monkeypatch.setattr(cache_module, "_PRUNE_EVERY", 1)
+    clock = iter(range(100))
+    monkeypatch.setattr(cache_module.time, "time", lambda: next(clock))
+    path = str(tmp_path / "emb.sqlite")
+    cache = cache_module.EmbeddingCache(path, max_memory_items=1, max_rows=2)
+
+    cache.put_many("m", [(b"a", [1.0])])
+    cache.put_many("m", [(b"b", [2.0])])
+    # Touching "a" on disk makes "b" the least recently used row
+    assert cache.get_many("m", [b"a"])[0].tolist() == [1.0]
+    cache.put_many("m", [(b"c", [3.0])])
+
+    fresh = cache_module.EmbeddingCache(path, max_memory_items=1)
+    found = fresh.get_many("m", [b"a", b"b", b"c"])
+    assert [vec is not None for vec in found] == [True, False, True]
@@ -0,0 +1,37 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("litellm")
+
+sys.path.insert(0, str(Path(__file__).parents[1] / "integration" / "hooks"))
+
+import litellm_ha_rag_hooks as hooks  # noqa: E402
+
+
+@pytest.mark.asyncio
+async def test_pre_call_hook_injects_context_into_multimodal_message(monkeypatch):
+    hook = hooks.HARagHook()
+
+    async def fake_query_bridge(self, payload, context):
+        return "light.nappali: on"
+
+    monkeypatch.setattr(hooks.HARagHook, "_query_bridge", fake_query_bridge)
+    data = {
+        "messages": [
+            {
+                "role": "user",
+                "content": [
+                    {"type": "text", "text": "mi van a nappaliban?"},
+                    {"type": "image_url", "image_url": {"url": "data:,"}},
+                ],
+            }
+        ]
+    }
+
+    result = await hook.async_pre_call_hook(None, None, data, "completion")
+
+    content = result["messages"][0]["content"]
+    assert content.startswith("Aktuálisan releváns eszközök:\nlight.nappali: on")
+    assert content.endswith("\n\nFelhasználói kérdés: mi van a nappaliban?")